@@ -1,33 +1,36 @@
-import os
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph import StateGraph, END, START
-from langgraph.prebuilt import ToolNode
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-from agents.Agents import AgentNodes
-from models.state import MediState
-from tools.tools import (
-    check_availability_by_doctor,
-    check_availability_by_specialization,
-    set_appointment,
-    cancel_appointment,
-    reschedule_appointment
-)
+import json
+import httpx
+from utils.config import BACKEND_URL
 
-# Initialize your graph
-nodes = AgentNodes()
-tools = [check_availability_by_doctor, check_availability_by_specialization, set_appointment, cancel_appointment, reschedule_appointment]
+# --- SSE client for the backend's /chat/stream ---
+def stream_chat(client, payload):
+    """Yield (event, data) pairs from one /chat/stream call."""
+    with client.stream("POST", f"{BACKEND_URL}/chat/stream", json=payload) as response:
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                yield event, json.loads(line[len("data: "):])
 
-builder = StateGraph(MediState)
-builder.add_node("assistant_node", nodes.assistant_node)
-builder.add_node("human_tool_review_node", nodes.human_tool_review_node)
-builder.add_node("tools", ToolNode(tools))
-
-builder.add_edge(START, "assistant_node")
-builder.add_conditional_edges("assistant_node", nodes.assistant_router, ["tools", "human_tool_review_node", END])
-builder.add_edge("tools", "assistant_node")
-builder.add_edge("human_tool_review_node", "assistant_node") # This is crucial for returning to the assistant after review
-
-graph = builder.compile(checkpointer=MemorySaver())
+def print_stream(client, payload):
+    """Print one streamed turn; returns the interrupts raised, if any."""
+    interrupts = []
+    print("Ralph: ", end="", flush=True)
+    for event, data in stream_chat(client, payload):
+        if event == "token":
+            print(data["content"], end="", flush=True)
+        elif event == "tool_start":
+            print(f"\n[Tool {data['name']} started: {data['input']}]", flush=True)
+        elif event == "tool_end":
+            print(f"[Tool Executed: {data['output']}]", flush=True)
+        elif event == "interrupt":
+            interrupts.append(data)
+        elif event == "error":
+            print(f"\nError: {data['detail']}")
+    print()
+    return interrupts
 
 # --- CLI Interaction ---
 def run_cli_agent():
@@ -35,70 +38,38 @@ def run_cli_agent():
     print("Type 'exit' to quit.")
 
     thread_id = "my_user_session" # You can use a unique ID per user if needed
-    config = {"configurable": {"thread_id": thread_id}}
-
-    while True:
-        user_input = input("\nYou: ")
-        if user_input.lower() == 'exit':
-            print("Goodbye!")
-            break
 
-        # Check if the graph is currently interrupted (waiting for human review)
-        current_state = graph.get_state(config)
-        if current_state.next and "human_tool_review_node" in current_state.next:
-            # If interrupted, the user input is the human's decision
-            try:
-                # The interrupt expects a dictionary with "action" and "data"
-                # For 'continue' or 'reject', 'data' might be empty or a message
-                action = user_input.lower()
+    with httpx.Client(timeout=None) as client:
+        interrupts = []
+        while True:
+            if interrupts:
+                # The graph is waiting for a human review decision
+                review = interrupts[-1]["value"]
+                print("Ralph (Tool Suggestion):")
+                for call in review.get("tool_calls", []):
+                    print(f"  - {call['name']}({call['args']})")
+                print("--- HUMAN REVIEW REQUIRED ---")
+                action = input("Do you approve these tool calls? (yes/no): ").strip().lower()
                 if action in ["yes", "y", "approve", "continue"]:
                     human_response_data = {"action": "continue"}
                 elif action in ["no", "n", "reject"]:
-                    human_response_data = {"action": "reject"}
+                    human_response_data = {"action": "reject", "data": input("Reason: ")}
                 else:
                     print("Invalid input for tool review. Please type 'yes' or 'no'.")
                     continue
-                
-                # Invoke the graph with the human's response to the interrupt
-                for s in graph.stream(human_response_data, config=config):
-                    # Process and print output as it streams
-                    if "__end__" not in s:
-                        for key, value in s.items():
-                            if key == "assistant_node":
-                                last_message = value["messages"][-1]
-                                if isinstance(last_message, AIMessage):
-                                    if last_message.tool_calls:
-                                        # The assistant is suggesting a tool call, the human_tool_review_node will handle the interruption
-                                        print(f"Ralph (Tool Suggestion): {last_message.tool_calls}")
-                                        print("--- HUMAN REVIEW REQUIRED ---")
-                                        print("Do you approve this tool call? (yes/no)")
-                                    else:
-                                        print(f"Ralph: {last_message.content}")
-                                elif isinstance(last_message, ToolMessage):
-                                    print(f"Tool Executed: {last_message.content}")
+                payload = {"thread_id": thread_id, "human_response": human_response_data}
+            else:
+                user_input = input("\nYou: ")
+                if user_input.lower() == 'exit':
+                    print("Goodbye!")
+                    break
+                payload = {"thread_id": thread_id, "user_input": user_input}
 
-            except Exception as e:
-                print(f"Error during human review: {e}")
-                print("Please try again.")
-        else:
-            # If not interrupted, it's a regular user message
-            print("Ralph is thinking...")
-            for s in graph.stream({"messages": [HumanMessage(content=user_input)]}, config=config):
-                # Process and print output as it streams
-                if "__end__" not in s:
-                    for key, value in s.items():
-                        if key == "assistant_node":
-                            last_message = value["messages"][-1]
-                            if isinstance(last_message, AIMessage):
-                                if last_message.tool_calls:
-                                    print(f"Ralph (Tool Suggestion): {last_message.tool_calls}")
-                                    print("--- HUMAN REVIEW REQUIRED ---")
-                                    print("Do you approve this tool call? (yes/no)")
-                                else:
-                                    print(f"Ralph: {last_message.content}")
-                            elif isinstance(last_message, ToolMessage):
-                                print(f"Tool Executed: {last_message.content}")
-                        # You can add other nodes here if you want to see their output
+            try:
+                interrupts = print_stream(client, payload)
+            except httpx.HTTPError as e:
+                print(f"Error talking to the backend at {BACKEND_URL}: {e}")
+                interrupts = []
 
 if __name__ == "__main__":
-    run_cli_agent()
\ No newline at end of file
+    run_cli_agent()
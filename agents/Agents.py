@@ -1,69 +1,78 @@
-from utils.config import GROQ_API_KEY,LLM_MODEL,TEMPERATURE
-from langchain_groq import ChatGroq
+from utils.config import LLM_CACHE
 from langgraph.types import Command,interrupt
-import os 
 from models.state import MediState,ralph_system_prompt
+from agents.context import ContextWindow
+from agents.llm_cache import CachedChatModel
+from agents.llm_gateway import GatewayChatModel, get_llm
+from storage.registry import get_registry
+from storage.slot_store import use_clinic
 from typing_extensions import Literal
-from langgraph.graph import StateGraph,START,END
-from langchain_core.messages import HumanMessage,AIMessage,SystemMessage,ToolMessage
-from tools.tools import (check_availability_by_doctor,
+from langgraph.graph import END
+from langchain_core.messages import ToolMessage
+from tools.tools import (list_doctors,
+                          check_availability_by_doctor,
                           check_availability_by_specialization,
+                          find_next_available,
                           set_appointment,
                           cancel_appointment,
                           reschedule_appointment)
 from dotenv import load_dotenv
 load_dotenv()
 
-tools = [check_availability_by_doctor,check_availability_by_specialization,set_appointment,cancel_appointment,reschedule_appointment]
+tools = [list_doctors,check_availability_by_doctor,check_availability_by_specialization,find_next_available,set_appointment,cancel_appointment,reschedule_appointment]
 
 class AgentNodes:
-    def __init__(self):
-        self.llm = ChatGroq(model=LLM_MODEL, temperature=TEMPERATURE, api_key=GROQ_API_KEY).bind_tools(tools=tools)
+    def __init__(self, llm=None, cache=LLM_CACHE):
+        llm = llm or get_llm()
+        # every call goes through the shared gateway (rate limits, retries, coalescing)
+        self.llm = GatewayChatModel(llm.bind_tools(tools=tools))
+        if cache:
+            self.llm = CachedChatModel(self.llm)
+        self.context = ContextWindow(summarizer=GatewayChatModel(llm))
 
 
+    def system_prompt(self, state: MediState) -> str:
+        registry = get_registry()
+        if len(registry.clinics) == 1:
+            return ralph_system_prompt
+        # the clinic name also keeps cached answers of different clinics apart
+        return f"{ralph_system_prompt} You work for {registry.name(state.clinic_id)}."
+
     def assistant_node(self,state: MediState) -> MediState:
-        response = self.llm.invoke(
-            [SystemMessage(content=ralph_system_prompt)] +
-            state.messages
-            )
+        with use_clinic(state.clinic_id): # the response cache is tied to this clinic's calendar
+            response = self.llm.invoke(self.context.build(self.system_prompt(state), state))
         state.messages = state.messages + [response]
         return state
-    
-    def human_review_prompt(self,tool_call):
-        print("Approval required for tool call:")
-        print(tool_call)
-        print("Type your action: 'continue' or 'reject'")
-
-        action = input("Action: ").strip().lower()
-        
-        if action == "reject":
-            reject = input("Enter reject message: ")
-            return {"action": "reject", "data": reject}
-        else:
-            # Default to continue
-            return {"action": "continue"}
 
+    async def aassistant_node(self,state: MediState) -> MediState:
+        with use_clinic(state.clinic_id):
+            response = await self.llm.ainvoke(await self.context.abuild(self.system_prompt(state), state))
+        state.messages = state.messages + [response]
+        return state
     
     def human_tool_review_node(self,state: MediState) -> Command[Literal["assistant_node", "tools"]]:
         last_message = state.messages[-1]
-        tool_call = last_message.tool_calls[-1]
+        # "continue" runs the whole message, so the reviewer must see every protected call in it
+        tool_calls = [call for call in last_message.tool_calls if call["name"] in state.protected_tools]
 
-        # Replace interrupt with console prompt
-        human_review = self.human_review_prompt(tool_call)
+        # Pauses the run until a reviewer resumes it with Command(resume={"action": ..., "data": ...});
+        # the checkpoint holds the state meanwhile, so no thread waits on the decision.
+        human_review = interrupt({"message": "Approval required for tool calls", "tool_calls": tool_calls})
 
         review_action = human_review.get("action")
         review_data = human_review.get("data")
 
-        if review_action == "continue":
-            return Command(goto="tools")
-        
-        elif review_action == "reject":
-            tool_message = ToolMessage(
-                content=review_data,
-                name=tool_call["name"],
-                tool_call_id=tool_call["id"]
-            )
-            return Command(goto="assistant_node", update={"messages": [tool_message]})
+        if review_action == "reject":
+            # every call of the message must be answered before the LLM sees it again
+            tool_messages = [ToolMessage(
+                content=review_data or "Rejected by reviewer.",
+                name=call["name"],
+                tool_call_id=call["id"]
+            ) for call in last_message.tool_calls]
+            return Command(goto="assistant_node", update={"messages": tool_messages})
+
+        # Default to continue
+        return Command(goto="tools")
 
 
 
@@ -0,0 +1,62 @@
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately, get_buffer_string
+from utils.config import CONTEXT_MAX_TURNS
+from utils.metrics import metrics
+
+SUMMARY_TAG = "context_summary"
+
+summary_prompt = ("You maintain a running summary of a medical appointment conversation. "
+                  "Merge the new messages into the existing summary. Keep every patient ID, doctor, "
+                  "specialization, date and time, and what was booked, cancelled or rescheduled. "
+                  "Reply with the updated summary only.")
+
+
+class ContextWindow:
+    """Builds the prompt from the last `max_turns` turns plus a rolling summary of older ones.
+
+    A turn starts at a HumanMessage, so an AIMessage's tool calls and their
+    ToolMessages always land on the same side of the cut. Older messages are
+    folded into `state.summary` incrementally: only the ones past
+    `state.summarized_upto` are sent to the summarizer.
+    """
+
+    def __init__(self, summarizer, max_turns=CONTEXT_MAX_TURNS):
+        self.summarizer = summarizer
+        self.max_turns = max_turns
+
+    def window_start(self, messages):
+        if self.max_turns <= 0:
+            return 0
+        turn_starts = [i for i, msg in enumerate(messages) if isinstance(msg, HumanMessage)]
+        if len(turn_starts) <= self.max_turns:
+            return 0
+        return turn_starts[-self.max_turns]
+
+    def _summary_request(self, state, start):
+        new = get_buffer_string(state.messages[state.summarized_upto:start])
+        return [SystemMessage(content=summary_prompt),
+                HumanMessage(content=f"Existing summary:\n{state.summary or '(none)'}\n\nNew messages:\n{new}")]
+
+    def _prompt(self, system_prompt, state, start):
+        if state.summary:
+            system_prompt = f"{system_prompt}\n\nSummary of the earlier conversation:\n{state.summary}"
+        prompt = [SystemMessage(content=system_prompt)] + state.messages[start:]
+        full = count_tokens_approximately([SystemMessage(content=system_prompt)] + state.messages)
+        metrics.observe("prompt_tokens", full, stage="full_history")
+        metrics.observe("prompt_tokens", count_tokens_approximately(prompt), stage="sent")
+        return prompt
+
+    def build(self, system_prompt, state):
+        """Fold newly aged-out messages into the summary (mutating `state`), then return the prompt."""
+        start = self.window_start(state.messages)
+        if start > state.summarized_upto:
+            summary = self.summarizer.invoke(self._summary_request(state, start), config={"tags": [SUMMARY_TAG]})
+            state.summary, state.summarized_upto = summary.content, start
+        return self._prompt(system_prompt, state, start)
+
+    async def abuild(self, system_prompt, state):
+        start = self.window_start(state.messages)
+        if start > state.summarized_upto:
+            summary = await self.summarizer.ainvoke(self._summary_request(state, start), config={"tags": [SUMMARY_TAG]})
+            state.summary, state.summarized_upto = summary.content, start
+        return self._prompt(system_prompt, state, start)
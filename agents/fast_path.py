@@ -0,0 +1,75 @@
+import re
+import uuid
+from typing_extensions import Literal
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from langgraph.graph import END
+from langgraph.types import Command
+from pydantic import ValidationError
+from models.state import MediState, change_request
+from tools.base_models import DateModel
+from storage.slot_store import get_store, use_clinic
+from tools.tools import (clinic_names,
+                         check_availability_by_doctor,
+                         check_availability_by_specialization)
+from utils.metrics import metrics
+
+_DATE = re.compile(r"\b\d{2}-\d{2}-\d{4}\b")
+_TIME = re.compile(r"\b\d{1,2}:\d{2}\b|\b\d{1,2}\s*(?:am|pm)\b")
+_AVAILABILITY = re.compile(r"\b(free|available|availability|slots?|openings?|open)\b")
+
+
+def match_availability_query(text):
+    """(tool, args) for an unambiguous availability lookup, else None.
+
+    Matches exactly one of the current clinic's doctors or specializations,
+    exactly one DD-MM-YYYY date, an availability keyword, and nothing that
+    looks like a booking request or a specific time.
+    """
+    text = text.lower()
+    if not _AVAILABILITY.search(text) or change_request.search(text) or _TIME.search(text):
+        return None
+    dates = set(_DATE.findall(text))
+    if len(dates) != 1:
+        return None
+    store = get_store()
+    doctors = [d for d in clinic_names("doctors", store) if d in text]
+    specializations = [s for s in clinic_names("specializations", store) if s in text or s.replace("_", " ") in text]
+    if len(doctors) + len(specializations) != 1:
+        return None
+    try:
+        desired_date = DateModel(date=dates.pop()).model_dump()
+    except ValidationError:
+        return None
+    if doctors:
+        return check_availability_by_doctor, {"desired_date": desired_date, "doctor_name": doctors[0]}
+    return check_availability_by_specialization, {"desired_date": desired_date, "specialization": specializations[0]}
+
+
+def format_reply(tool, args, result):
+    if tool is check_availability_by_specialization and result.startswith("- "):
+        return f"Here is the availability for {args['specialization'].replace('_', ' ')} on {args['desired_date']['date']}:\n{result}"
+    return result
+
+
+def fast_path_node(state: MediState) -> Command[Literal["assistant_node", "__end__"]]:
+    """Answer plain availability lookups straight from the slot store, without an LLM call.
+
+    The tool call and its result are still written to the history, so the
+    LLM sees them on the next turn exactly as if it had made the call.
+    """
+    last_message = state.messages[-1] if state.messages else None
+    with use_clinic(state.clinic_id):
+        matched = isinstance(last_message, HumanMessage) and match_availability_query(str(last_message.content))
+        if not matched:
+            metrics.inc("fast_path", result="fallthrough")
+            return Command(goto="assistant_node")
+
+        tool, args = matched
+        call_id = f"fast_{uuid.uuid4().hex}"
+        result = tool.invoke(args)
+    metrics.inc("fast_path", result="answered")
+    return Command(goto=END, update={"messages": [
+        AIMessage(content="", tool_calls=[{"name": tool.name, "args": args, "id": call_id, "type": "tool_call"}]),
+        ToolMessage(content=result, name=tool.name, tool_call_id=call_id),
+        AIMessage(content=format_reply(tool, args, result)),
+    ]})
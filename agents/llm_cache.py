@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from langchain_core.messages import HumanMessage, message_to_dict, messages_from_dict
+from models.state import change_request
+from storage.slot_store import current_clinic, get_store
+from utils.config import (LLM_CACHE_DB, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS,
+                          LLM_CACHE_SIMILARITY)
+from utils.metrics import metrics
+
+_SPACE = re.compile(r"\s+")
+_WORD = re.compile(r"[a-z0-9_:-]+")
+_SALIENT = re.compile(r"\d[\d:-]*")
+
+
+def normalize_message(msg):
+    content = msg.content if isinstance(msg.content, str) else json.dumps(msg.content, sort_keys=True)
+    entry = [msg.type, _SPACE.sub(" ", content.strip().lower())]
+    for call in getattr(msg, "tool_calls", None) or []:
+        entry.append([call["name"], json.dumps(call["args"], sort_keys=True)])
+    return entry
+
+
+def digest(value):
+    return hashlib.sha256(json.dumps(value, separators=(",", ":")).encode()).hexdigest()
+
+
+def hashed_embedding(text, dims=256):
+    """Dependency-free local embedding: L2-normalized hashed bag of words and word bigrams."""
+    words = _WORD.findall(text.lower())
+    counts = Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+    vector = [0.0] * dims
+    for token, count in counts.items():
+        vector[int(hashlib.md5(token.encode()).hexdigest(), 16) % dims] += count
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def revive(value):
+    """Rebuild a cached AIMessage with fresh message and tool-call ids, so a
+    replayed answer is appended to the thread rather than merged into an earlier one."""
+    message = messages_from_dict([value])[0]
+    message.id = None
+    for call in message.tool_calls:
+        call["id"] = f"call_{uuid.uuid4().hex}"
+    return message
+
+
+class CachedChatModel:
+    """Response cache in front of the tool-bound chat model.
+
+    Exact tier: key = hash of the normalized prompt (message types, lowercased
+    whitespace-collapsed content, tool calls without ids). Entries live in an
+    in-memory LRU with a TTL, backed by a SQLite table shared by all workers;
+    both keep at most max_entries entries.
+
+    Similarity tier (LLM_CACHE_SIMILARITY > 0): a miss may reuse an entry with
+    the same history prefix, the same numbers/dates in the last user message
+    and an embedding cosine above the threshold. It only serves plain answers,
+    never tool calls, and never for a message that asks to book, cancel or
+    otherwise change an appointment: a near match could replay the opposite
+    action.
+
+    Every entry is tagged with its clinic and that clinic's slot store state
+    token; when a clinic's calendar changes, its older entries are dropped, so
+    no cached answer can describe stale availability. Other clinics' entries
+    are kept.
+    """
+
+    def __init__(self, llm, path=LLM_CACHE_DB, max_entries=LLM_CACHE_MAX_ENTRIES,
+                 ttl_seconds=LLM_CACHE_TTL_SECONDS, similarity=LLM_CACHE_SIMILARITY,
+                 embed=hashed_embedding, state_token=lambda: get_store().state_token, clinic=current_clinic):
+        self.llm = llm
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.embed = embed
+        self.state_token = state_token
+        self.clinic = clinic
+        self._lock = threading.Lock()
+        self._memory = OrderedDict() # (clinic, key) -> (created, value)
+        self._tokens = {} # clinic -> the state token its entries were checked against
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(llm_cache)")]
+        if columns and "clinic" not in columns:
+            self._db.execute("DROP TABLE llm_cache") # written before entries were per clinic; only a cache
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                clinic TEXT NOT NULL, key TEXT NOT NULL, state_token TEXT NOT NULL, created REAL NOT NULL,
+                prefix TEXT NOT NULL, salient TEXT NOT NULL, embedding TEXT, value TEXT NOT NULL,
+                PRIMARY KEY (clinic, key));
+            CREATE INDEX IF NOT EXISTS llm_cache_prefix ON llm_cache (clinic, prefix, salient);
+            CREATE INDEX IF NOT EXISTS llm_cache_created ON llm_cache (created);
+        """)
+
+    # ---- keys ----
+
+    def _keys(self, messages):
+        normalized = [normalize_message(m) for m in messages]
+        key = digest(normalized)
+        last = messages[-1] if messages else None
+        if not isinstance(last, HumanMessage):
+            return key, None, None, None
+        text = normalized[-1][1]
+        return key, digest(normalized[:-1]), " ".join(sorted(_SALIENT.findall(text))), text
+
+    def _sync_state(self, clinic, token):
+        """Drop the clinic's entries recorded against an older state of its calendar."""
+        if token != self._tokens.get(clinic):
+            for stale in [k for k in self._memory if k[0] == clinic]:
+                del self._memory[stale]
+            self._db.execute("DELETE FROM llm_cache WHERE clinic = ? AND state_token != ?", (clinic, token))
+            self._db.commit()
+            self._tokens[clinic] = token
+
+    # ---- lookup / store ----
+
+    def lookup(self, messages):
+        key, prefix, salient, text = self._keys(messages)
+        clinic, now = self.clinic(), time.time()
+        with self._lock:
+            self._sync_state(clinic, self.state_token())
+            entry = self._memory.get((clinic, key))
+            if entry and now - entry[0] < self.ttl_seconds:
+                self._memory.move_to_end((clinic, key))
+                metrics.inc("llm_cache", result="hit", tier="memory")
+                return revive(entry[1])
+
+            row = self._db.execute("SELECT created, value FROM llm_cache WHERE clinic = ? AND key = ?",
+                                   (clinic, key)).fetchone()
+            if row and now - row[0] < self.ttl_seconds:
+                value = json.loads(row[1])
+                self._remember((clinic, key), row[0], value)
+                metrics.inc("llm_cache", result="hit", tier="disk")
+                return revive(value)
+
+            if self.similarity > 0 and prefix is not None and not change_request.search(text):
+                query = self.embed(text)
+                for created, embedding, value in self._db.execute(
+                        "SELECT created, embedding, value FROM llm_cache WHERE clinic = ? AND prefix = ? AND salient = ?",
+                        (clinic, prefix, salient)):
+                    if now - created < self.ttl_seconds and embedding and \
+                            sum(a * b for a, b in zip(query, json.loads(embedding))) >= self.similarity:
+                        message = revive(json.loads(value))
+                        if message.tool_calls:
+                            continue
+                        metrics.inc("llm_cache", result="hit", tier="similar")
+                        return message
+
+        metrics.inc("llm_cache", result="miss")
+        return None
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def store(self, messages, response, token):
+        key, prefix, salient, text = self._keys(messages)
+        value = message_to_dict(response)
+        clinic, now = self.clinic(), time.time()
+        # only plain answers are candidates for the similarity tier
+        similar = self.similarity > 0 and text is not None and not getattr(response, "tool_calls", None)
+        embedding = json.dumps(self.embed(text)) if similar else None
+        with self._lock:
+            if token != self.state_token():
+                return  # the calendar changed while the model was answering
+            self._remember((clinic, key), now, value)
+            self._db.execute("INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (clinic, key, token, now, prefix or "", salient or "", embedding, json.dumps(value)))
+            self._db.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl_seconds,))
+            # the table holds at most max_entries rows too, the oldest go first
+            self._db.execute("DELETE FROM llm_cache WHERE rowid IN "
+                             "(SELECT rowid FROM llm_cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                             (self.max_entries,))
+            self._db.commit()
+
+    # ---- chat model interface ----
+
+    def invoke(self, messages, config=None, **kwargs):
+        cached = self.lookup(messages)
+        if cached is not None:
+            return cached
+        token = self.state_token()
+        response = self.llm.invoke(messages, config=config, **kwargs)
+        self.store(messages, response, token)
+        return response
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        # SQLite and the store refresh (which may reload under the file lock) stay off the event loop;
+        # to_thread copies the context, so they still see the current clinic
+        cached = await asyncio.to_thread(self.lookup, messages)
+        if cached is not None:
+            return cached
+        token = await asyncio.to_thread(self.state_token)
+        response = await self.llm.ainvoke(messages, config=config, **kwargs)
+        await asyncio.to_thread(self.store, messages, response, token)
+        return response
@@ -0,0 +1,292 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from langchain_core.messages import message_to_dict
+from langchain_core.messages.utils import count_tokens_approximately
+
+from agents.llm_cache import digest, revive
+from utils.config import (GROQ_API_KEY, LLM_MODEL, TEMPERATURE, LLM_BASE_URL, LLM_MAX_CONNECTIONS,
+                          LLM_MAX_KEEPALIVE, LLM_TIMEOUT_SECONDS, LLM_REQUESTS_PER_MINUTE,
+                          LLM_TOKENS_PER_MINUTE, LLM_MAX_RETRIES, LLM_BACKOFF_SECONDS, LLM_BACKOFF_MAX_SECONDS)
+from utils.metrics import metrics
+
+# reserved from the token bucket for the completion until the real usage is known
+EXPECTED_OUTPUT_TOKENS = 256
+
+
+class LLMUnavailableError(Exception):
+    """The provider kept failing (rate limits, 5xx, timeouts) through every retry."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def make_chat_model(model=LLM_MODEL, base_url=LLM_BASE_URL, api_key=GROQ_API_KEY, temperature=TEMPERATURE):
+    """A Groq chat model on pooled keep-alive HTTP clients, with its own retries off (the gateway retries)."""
+    import httpx
+    from langchain_groq import ChatGroq # heavy import; deferred until a real model is needed
+
+    limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_KEEPALIVE)
+    return ChatGroq(model=model, temperature=temperature, api_key=api_key, base_url=base_url,
+                    max_retries=0, timeout=LLM_TIMEOUT_SECONDS,
+                    http_client=httpx.Client(limits=limits, timeout=LLM_TIMEOUT_SECONDS),
+                    http_async_client=httpx.AsyncClient(limits=limits, timeout=LLM_TIMEOUT_SECONDS))
+
+
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    """The process-wide Groq chat model, created on first use."""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = make_chat_model()
+    return _llm
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets shared by every caller in the process.
+
+    `reserve` debits both buckets at once (they may go negative) and returns
+    how long the caller has to wait for its turn, so threads and coroutines
+    queue fairly behind each other. `settle` corrects the token estimate with
+    the real usage. A 429 pauses everyone until the provider's retry-after and
+    halves the rates; each success wins back 5% of the configured limit.
+    A limit of 0 means unlimited.
+    """
+
+    def __init__(self, requests_per_minute=LLM_REQUESTS_PER_MINUTE, tokens_per_minute=LLM_TOKENS_PER_MINUTE):
+        self.limits = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self.rates = dict(self.limits)
+        self.levels = dict(self.limits) # start full: a minute's worth of burst
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed, self._updated = now - self._updated, now
+        for kind, rate in self.rates.items():
+            if rate:
+                self.levels[kind] = min(self.limits[kind], self.levels[kind] + elapsed * rate / 60)
+
+    def reserve(self, tokens):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, self.paused_until - now)
+            for kind, amount in (("requests", 1), ("tokens", tokens)):
+                if self.rates[kind]:
+                    self.levels[kind] -= amount
+                    wait = max(wait, -self.levels[kind] * 60 / self.rates[kind])
+            return wait
+
+    def settle(self, estimated, used):
+        with self._lock:
+            if self.rates["tokens"]:
+                self.levels["tokens"] += estimated - used
+
+    def throttled(self, retry_after):
+        with self._lock:
+            now = time.monotonic()
+            already_paused = now < self.paused_until
+            self.paused_until = max(self.paused_until, now + retry_after)
+            if already_paused:
+                return # the concurrent 429s of one burst only cut the rates once
+            for kind, limit in self.limits.items():
+                if limit:
+                    self.rates[kind] = max(limit * 0.1, self.rates[kind] / 2)
+
+    def succeeded(self):
+        with self._lock:
+            for kind, limit in self.limits.items():
+                if limit:
+                    self.rates[kind] = min(limit, self.rates[kind] + limit * 0.05)
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _retryable(error):
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError") or isinstance(
+        error, (TimeoutError, ConnectionError))
+
+
+def _request_key(model, messages, kwargs):
+    """Identical requests: same model object, same messages (ids aside), same call arguments."""
+    entries = [[m.type, m.content, [[c["name"], c["args"]] for c in getattr(m, "tool_calls", None) or []]]
+               for m in messages]
+    return digest([id(model), json.loads(json.dumps(entries, sort_keys=True, default=str)),
+                   repr(sorted(kwargs.items()))])
+
+
+class LLMGateway:
+    """Every LLM call of the process goes through here: rate limited, retried with
+    jittered exponential backoff, and coalesced with an identical call already in
+    flight (the followers get a copy of the leader's answer)."""
+
+    def __init__(self, limiter=None, max_retries=LLM_MAX_RETRIES, backoff=LLM_BACKOFF_SECONDS,
+                 backoff_max=LLM_BACKOFF_MAX_SECONDS):
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self._inflight = {}
+        self._lock = threading.Lock()
+        metrics.add("llm_gateway_queue_depth", 0) # exported from the start, not only once something queues
+
+    def _join(self, key):
+        """(future, is_leader) for the request `key`."""
+        with self._lock:
+            if key in self._inflight:
+                metrics.inc("llm_gateway_coalesced")
+                return self._inflight[key], False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            del self._inflight[key]
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    @staticmethod
+    def _copy(response):
+        return revive(message_to_dict(response))
+
+    def _reserve(self, messages):
+        estimate = count_tokens_approximately(messages) + EXPECTED_OUTPUT_TOKENS
+        return estimate, self.limiter.reserve(estimate)
+
+    def _settle(self, estimate, response):
+        usage = getattr(response, "usage_metadata", None) or {}
+        self.limiter.settle(estimate, usage.get("total_tokens", estimate))
+        self.limiter.succeeded()
+
+    def _backoff(self, error, attempt):
+        """Seconds to wait before retrying `error`, or None if it shouldn't be retried."""
+        if not _retryable(error):
+            return None
+        retry_after = _retry_after(error)
+        reason = "rate_limited" if getattr(error, "status_code", None) == 429 else "unavailable"
+        if reason == "rate_limited":
+            self.limiter.throttled(retry_after or self.backoff)
+        if attempt >= self.max_retries:
+            metrics.inc("llm_gateway_failures", reason=reason)
+            raise LLMUnavailableError(f"LLM provider unavailable after {attempt + 1} attempts: {error}",
+                                      retry_after=retry_after) from error
+        metrics.inc("llm_gateway_retries", reason=reason)
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    def _queued(self, wait):
+        metrics.histogram("llm_gateway_wait_seconds", wait)
+        if wait > 0:
+            metrics.add("llm_gateway_queue_depth", 1)
+        return wait
+
+    def invoke(self, model, messages, config=None, **kwargs):
+        key = _request_key(model, messages, kwargs)
+        future, leader = self._join(key)
+        if not leader:
+            return self._copy(future.result())
+        try:
+            response = self._call(model, messages, config, kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=response)
+        return response
+
+    def _call(self, model, messages, config, kwargs):
+        for attempt in range(self.max_retries + 1):
+            estimate, wait = self._reserve(messages)
+            if self._queued(wait):
+                try:
+                    time.sleep(wait)
+                finally:
+                    metrics.add("llm_gateway_queue_depth", -1)
+            try:
+                response = model.invoke(messages, config=config, **kwargs)
+            except Exception as e:
+                delay = self._backoff(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self._settle(estimate, response)
+            return response
+
+    async def ainvoke(self, model, messages, config=None, **kwargs):
+        key = _request_key(model, messages, kwargs)
+        future, leader = self._join(key)
+        if not leader:
+            return self._copy(await asyncio.wrap_future(future))
+        try:
+            response = await self._acall(model, messages, config, kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=response)
+        return response
+
+    async def _acall(self, model, messages, config, kwargs):
+        for attempt in range(self.max_retries + 1):
+            estimate, wait = self._reserve(messages)
+            if self._queued(wait):
+                try:
+                    await asyncio.sleep(wait)
+                finally:
+                    metrics.add("llm_gateway_queue_depth", -1)
+            try:
+                response = await model.ainvoke(messages, config=config, **kwargs)
+            except Exception as e:
+                delay = self._backoff(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._settle(estimate, response)
+            return response
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+def get_gateway():
+    """The process-wide gateway: one rate limiter and one in-flight table for all models."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
+
+
+class GatewayChatModel:
+    """`model` (a chat model, possibly tool-bound) called through the process gateway."""
+
+    def __init__(self, model, gateway=None):
+        self.model = model
+        self.gateway = gateway or get_gateway()
+
+    def invoke(self, messages, config=None, **kwargs):
+        return self.gateway.invoke(self.model, messages, config, **kwargs)
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        return await self.gateway.ainvoke(self.model, messages, config, **kwargs)
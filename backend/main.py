@@ -1,111 +1,405 @@
 # backend/main.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
 import asyncio
-from typing import List, Optional, Union, Dict, Any
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
-from langgraph.checkpoint.memory import MemorySaver 
-from workflow.graph import build_graph
-from langgraph.types import Interrupt # Import Interrupt
+import json
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Union, Dict, Any, Literal, Annotated
+from pydantic import Field
+from langchain_core.messages import HumanMessage, AIMessage
+from workflow.graph import get_graph, tools
+from backend.warmup import warmup
+from langgraph.types import Command
+from utils.config import TOOL_WORKERS
+from storage.approvals import ApprovalQueue, APPROVED, REJECTED
+from storage.registry import get_registry, UnknownClinicError
+from storage.slot_store import get_store, use_clinic
+from storage.message_log import encode_message
+from tools.base_models import DateModel, DateTimeModel, IdentificationNumberModel
+from tools.tools import DoctorName, Specialization, unknown_name
+from utils.metrics import metrics
+from utils.tracing import traces, traced_config
+from agents.context import SUMMARY_TAG
+from agents.llm_gateway import LLMUnavailableError
 
 app = FastAPI()
 graph = None 
+approvals = None
 
 @app.on_event("startup")
 async def startup_event():
-    global graph
-    print("Initializing LangGraph...")
-    graph = build_graph()
-    print("LangGraph initialized.")
+    global graph, approvals
+    # Sync tools and nodes are run by LangGraph in the loop's default executor; bound it
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=TOOL_WORKERS))
+    await asyncio.to_thread(warmup) # a no-op when gunicorn already ran it before forking
+    if graph is None: # benchmarks install their own graph before startup
+        print("Initializing LangGraph...")
+        graph = get_graph()
+        print("LangGraph initialized.")
+    if approvals is None:
+        approvals = ApprovalQueue()
 
 class ChatRequest(BaseModel):
     user_input: Optional[str] = None # user_input can be None if it's a human_response
     thread_id: str 
     human_response: Optional[Dict[str, str]] = None # {"action": "continue"/"reject", "data": "reason"}
+    since: Optional[int] = Field(None, ge=0) # the `cursor` of the previous response: only send newer messages
+    clinic_id: Optional[str] = None # a clinic of GET /clinics; only needed on a thread's first message (default clinic)
 
 class ChatResponse(BaseModel):
     response: str
-    full_messages: List[Dict[str, Any]]
+    full_messages: Optional[List[Dict[str, Any]]] = None # the whole history, when the request has no `since`
+    messages: Optional[List[Dict[str, Any]]] = None # the messages after `since`, when it is given
+    cursor: int = 0 # the thread's message count; send it back as `since`
     requires_human_input: bool = False
-    human_input_prompt: Optional[Dict[str, Any]] = None # e.g., {"message": "...", "tool_call": {}}
+    human_input_prompt: Optional[Dict[str, Any]] = None # e.g., {"message": "...", "tool_calls": [{...}, ...]}
+    trace_id: Optional[str] = None # look up the run's spans at /traces/{trace_id}
 
-@app.post("/chat")
-async def chat_endpoint(request: ChatRequest):
-    if graph is None:
-        raise HTTPException(status_code=503, detail="LangGraph not initialized yet.")
+def resolve_clinic(clinic_id):
+    try:
+        return get_registry().resolve(clinic_id)
+    except UnknownClinicError:
+        raise HTTPException(status_code=404, detail=f"Unknown clinic {clinic_id!r}; see GET /clinics.")
 
-    config = {"configurable": {"thread_id": request.thread_id}}
-    
-    # Determine the initial state or input to the graph
-    graph_input = {}
+def build_graph_input(request: ChatRequest):
+    """Graph input for a chat request: a new user turn or a human review decision."""
     if request.human_response:
         # If human_response is present, it means we are resuming an interrupted graph
         # and feeding the human's decision back to the interrupt point.
-        graph_input = request.human_response 
+        graph_input = Command(resume=request.human_response)
     elif request.user_input is not None:
         # Otherwise, if user_input is present, it's a new user query
         initial_state = {
             "messages": [HumanMessage(content=request.user_input)],
             "yolo_mode": False 
         }
+        if request.clinic_id is not None:
+            initial_state["clinic_id"] = resolve_clinic(request.clinic_id)
         graph_input = initial_state
     else:
         raise HTTPException(status_code=400, detail="Either 'user_input' or 'human_response' must be provided.")
+    return graph_input
 
-    try:
-        output = graph.invoke(
-            graph_input,
-            config=config # Pass the thread_id config
+@app.get("/clinics")
+async def clinics_endpoint():
+    return {"clinics": get_registry().summary()}
+
+@app.get("/metrics")
+async def metrics_endpoint(format: Literal["prometheus", "json"] = "prometheus"):
+    if format == "json":
+        return metrics.snapshot()
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/traces")
+async def traces_endpoint(thread_id: str):
+    return {"thread_id": thread_id, "traces": traces.for_thread(thread_id)}
+
+@app.get("/traces/{trace_id}")
+async def trace_endpoint(trace_id: str):
+    trace = traces.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired trace id.")
+    return trace
+
+def json_response(content, headers=None):
+    """`content` rendered by orjson; it may embed pre-encoded orjson.Fragment messages."""
+    return Response(orjson.dumps(content, default=str), media_type="application/json", headers=headers)
+
+async def serialize_messages(thread_id, messages, since=0):
+    """(cursor, messages[since:] as pre-encoded JSON fragments).
+
+    With the sqlite checkpointer every message was encoded once when its
+    checkpoint was saved, so this costs O(new messages), not O(history).
+    """
+    message_log = getattr(graph.checkpointer, "message_log", None)
+    if message_log is not None:
+        cursor, encoded = await asyncio.to_thread(message_log.since, thread_id, since)
+        if cursor == len(messages):
+            return cursor, [orjson.Fragment(body) for body in encoded]
+    if since > len(messages):
+        since = 0 # unknown cursor (e.g. the thread expired): resend everything
+    return len(messages), [orjson.Fragment(encode_message(msg)) for msg in messages[since:]]
+
+def response_text(messages):
+    """The last relevant message for the main response display."""
+    for msg in reversed(messages):
+        if msg.content:
+            return msg.content
+    if messages:
+        # If no content found, try to represent tool calls or message type
+        last_msg_raw = messages[-1]
+        if getattr(last_msg_raw, 'tool_calls', None):
+            return f"Agent suggested tool call(s): {[tc['name'] for tc in last_msg_raw.tool_calls]}"
+        return f"Agent responded with a message of type: {last_msg_raw.type} (no content)."
+    return ""
+
+async def queue_interrupts(snapshot, thread_id):
+    """Put the run's pending reviews on the approval queue; returns them as {"id": ..., **value},
+    listing every protected call the decision covers under "tool_calls"."""
+    pending = []
+    for interrupt in snapshot.interrupts:
+        review = {"id": interrupt.id, **interrupt.value}
+        if "tool_call" in review: # paused before reviews covered the whole message
+            review["tool_calls"] = [review.pop("tool_call")]
+        pending.append(review)
+    for review in pending:
+        await asyncio.to_thread(approvals.add, review["id"], thread_id, review)
+    return pending
+
+async def run_chat(graph_input, config, since=None):
+    """Run the graph to completion or to its next review interrupt; returns a ChatResponse-shaped dict."""
+    thread_id = config["configurable"]["thread_id"]
+    output = await graph.ainvoke(graph_input, config=config)
+    snapshot = await graph.aget_state(config)
+    messages = output.get("messages", []) if output else []
+    cursor, encoded = await serialize_messages(thread_id, messages, since or 0)
+    history = {"full_messages": encoded} if since is None else {"messages": encoded}
+
+    # --- Handle Interruptions ---
+    # A protected tool call paused the run in human_tool_review_node; it waits in the
+    # checkpoint (and on the approval queue) until /chat or /approvals resumes it.
+    if snapshot.interrupts:
+        pending = await queue_interrupts(snapshot, thread_id)
+        return dict(
+            response="Awaiting human confirmation for tool execution.",
+            **history,
+            cursor=cursor,
+            requires_human_input=True,
+            human_input_prompt=pending[0], # {"id": ..., "message": "...", "tool_calls": [{...}, ...]}
+            trace_id=config["metadata"]["trace_id"]
         )
-        
-        # --- Handle Interruptions ---
-        # The result of `invoke` will be an `Interrupt` object if the graph interrupted
-        if isinstance(output, Interrupt):
-            print(f"Graph interrupted! Data: {output.data}")
-            return ChatResponse(
-                response="Awaiting human confirmation for tool execution.",
-                full_messages=[], # We don't have a new message from the assistant yet
-                requires_human_input=True,
-                human_input_prompt=output.data # This will be the dict from interrupt(...)
-            )
-
-        # --- Handle Normal Graph Completion ---
-        response_message = ""
-        serializable_messages = []
-
-        if output and output.get("messages"):
-            # Prepare messages for serialization
-            for msg in output["messages"]:
-                if isinstance(msg, (HumanMessage, AIMessage, SystemMessage, ToolMessage)):
-                    serializable_messages.append({
-                        "type": msg.type, 
-                        "content": msg.content, 
-                        "tool_calls": [tc.dict() for tc in msg.tool_calls] if getattr(msg, 'tool_calls', None) else None,
-                        "name": msg.name if hasattr(msg, 'name') else None,
-                        "tool_call_id": msg.tool_call_id if hasattr(msg, 'tool_call_id') else None
-                    })
-                else:
-                    serializable_messages.append({"type": "unknown", "content": str(msg)})
-
-            # Find the last relevant message for the main response display
-            for msg in reversed(output["messages"]):
-                if isinstance(msg, AIMessage) and msg.content:
-                    response_message = msg.content
-                    break
-                elif msg.content: 
-                    response_message = msg.content
-                    break
-            
-            if not response_message:
-                # If no content found, try to represent tool calls or message type
-                last_msg_raw = output["messages"][-1]
-                if getattr(last_msg_raw, 'tool_calls', None):
-                    response_message = f"Agent suggested tool call(s): {[tc.name for tc in last_msg_raw.tool_calls]}"
-                elif last_msg_raw.type:
-                    response_message = f"Agent responded with a message of type: {last_msg_raw.type} (no content)."
-
-        return ChatResponse(response=response_message, full_messages=serializable_messages)
 
+    # --- Handle Normal Graph Completion ---
+    return dict(response=response_text(messages), **history, cursor=cursor, requires_human_input=False,
+                human_input_prompt=None, trace_id=config["metadata"]["trace_id"])
+
+async def resolve_reviews(request: ChatRequest):
+    """A human_response sent to /chat decides the thread's queued reviews too."""
+    if request.human_response:
+        status = REJECTED if request.human_response.get("action") == "reject" else APPROVED
+        await asyncio.to_thread(approvals.resolve_thread, request.thread_id, status, request.human_response)
+
+# The response embeds pre-encoded message fragments; it is rendered by orjson, not re-validated by pydantic
+@app.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(request: ChatRequest):
+    if graph is None:
+        raise HTTPException(status_code=503, detail="LangGraph not initialized yet.")
+
+    config = traced_config(request.thread_id)
+    trace_id = config["metadata"]["trace_id"]
+    graph_input = build_graph_input(request)
+
+    try:
+        await resolve_reviews(request)
+        return json_response(await run_chat(graph_input, config, request.since), headers={"X-Trace-Id": trace_id})
+    except LLMUnavailableError as e:
+        # provider overloaded even after retries: tell the client when to come back instead of a bare 500
+        print(f"LLM unavailable (trace {trace_id}): {e}")
+        headers = {"Retry-After": str(max(1, round(e.retry_after or 1)))}
+        raise HTTPException(status_code=503, detail="The assistant is busy right now, please retry shortly.",
+                            headers=headers)
+    except Exception as e:
+        print(f"Error during graph invocation (trace {trace_id}): {e}")
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+
+@app.get("/threads/{thread_id}/messages")
+async def thread_messages_endpoint(thread_id: str, since: int = 0):
+    """A thread's messages after `since`, e.g. to catch up after /chat/stream or an approval."""
+    if graph is None:
+        raise HTTPException(status_code=503, detail="LangGraph not initialized yet.")
+    message_log = getattr(graph.checkpointer, "message_log", None)
+    if message_log is not None:
+        cursor, encoded = await asyncio.to_thread(message_log.since, thread_id, since)
+        fragments = [orjson.Fragment(body) for body in encoded]
+    else:
+        snapshot = await graph.aget_state({"configurable": {"thread_id": thread_id}})
+        cursor, fragments = await serialize_messages(thread_id, snapshot.values.get("messages", []), since)
+    return json_response({"thread_id": thread_id, "messages": fragments, "cursor": cursor})
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def stream_chat_events(graph_input, config):
+    """Yield SSE frames for LLM tokens, tool start/end and interrupts of one graph run."""
+    response_message = ""
+    streamed_runs = set()
+    tool_names = {t.name for t in tools}
+    try:
+        async for event in graph.astream_events(graph_input, config=config, version="v2"):
+            kind = event["event"]
+            from_assistant = (event["metadata"].get("langgraph_node") == "assistant_node"
+                              and SUMMARY_TAG not in event.get("tags", []))
+            if kind == "on_chat_model_stream" and from_assistant:
+                token = event["data"]["chunk"].content
+                if token:
+                    streamed_runs.add(event["run_id"])
+                    response_message += token
+                    yield sse_event("token", {"content": token})
+            elif kind == "on_chat_model_end" and from_assistant and event["run_id"] not in streamed_runs:
+                # models without native streaming still deliver their answer as one token
+                token = event["data"]["output"].content
+                if token:
+                    response_message += token
+                    yield sse_event("token", {"content": token})
+            elif kind == "on_tool_start" and event["name"] in tool_names:
+                yield sse_event("tool_start", {"name": event["name"], "run_id": event["run_id"],
+                                               "input": event["data"].get("input")})
+            elif kind == "on_tool_end" and event["name"] in tool_names:
+                output = event["data"].get("output")
+                yield sse_event("tool_end", {"name": event["name"], "run_id": event["run_id"],
+                                             "output": getattr(output, "content", output)})
+
+        snapshot = await graph.aget_state(config)
+        messages = snapshot.values.get("messages", [])
+        if not response_message and messages and isinstance(messages[-1], AIMessage) and messages[-1].content:
+            # answered without a model call (fast path): send the reply in one piece
+            response_message = messages[-1].content
+            yield sse_event("token", {"content": response_message})
+        for review in await queue_interrupts(snapshot, config["configurable"]["thread_id"]):
+            yield sse_event("interrupt", {"id": review["id"], "value": review})
+        yield sse_event("done", {"response": response_message, "requires_human_input": bool(snapshot.interrupts),
+                                 "trace_id": config["metadata"]["trace_id"], "cursor": len(messages)})
+    except LLMUnavailableError as e:
+        print(f"LLM unavailable during streaming: {e}")
+        yield sse_event("error", {"detail": "The assistant is busy right now, please retry shortly.",
+                                  "retry_after": e.retry_after})
+    except Exception as e:
+        print(f"Error during graph streaming: {e}")
+        yield sse_event("error", {"detail": f"An error occurred: {e}"})
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    if graph is None:
+        raise HTTPException(status_code=503, detail="LangGraph not initialized yet.")
+
+    config = traced_config(request.thread_id)
+    graph_input = build_graph_input(request)
+    await resolve_reviews(request)
+    return StreamingResponse(stream_chat_events(graph_input, config), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no",
+                                      "X-Trace-Id": config["metadata"]["trace_id"]})
+
+
+# --- Review queue: protected tool calls waiting for a human decision ---
+
+class ApprovalDecision(BaseModel):
+    ids: List[str] = Field(min_length=1) # approval ids, as listed by GET /approvals
+    reason: Optional[str] = None # sent back to the assistant on reject
+
+@app.get("/approvals")
+async def approvals_endpoint(thread_id: Optional[str] = None, limit: int = 100):
+    return {"pending": await asyncio.to_thread(approvals.pending, thread_id, limit)}
+
+async def decide(approval_id, status, human_response):
+    """Claim one pending review and resume its thread with the decision."""
+    claimed = await asyncio.to_thread(approvals.claim, approval_id, status, human_response)
+    if claimed is None:
+        return {"id": approval_id, "ok": False, "error": "Not pending (unknown, or already decided)."}
+    config = traced_config(claimed["thread_id"])
+    try:
+        result = await run_chat(Command(resume=human_response), config)
     except Exception as e:
-        print(f"Error during graph invocation: {e}")
-        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
\ No newline at end of file
+        print(f"Error resuming thread {claimed['thread_id']} (trace {config['metadata']['trace_id']}): {e}")
+        return {"id": approval_id, "thread_id": claimed["thread_id"], "ok": False, "error": str(e)}
+    return {"id": approval_id, "thread_id": claimed["thread_id"], "ok": True, "result": result}
+
+@app.post("/approvals/approve")
+async def approve_endpoint(request: ApprovalDecision):
+    if graph is None:
+        raise HTTPException(status_code=503, detail="LangGraph not initialized yet.")
+    # each approval resumes its own thread; they run concurrently
+    return json_response(
+        {"results": await asyncio.gather(*(decide(i, APPROVED, {"action": "continue"}) for i in request.ids))})
+
+@app.post("/approvals/reject")
+async def reject_endpoint(request: ApprovalDecision):
+    if graph is None:
+        raise HTTPException(status_code=503, detail="LangGraph not initialized yet.")
+    human_response = {"action": "reject", "data": request.reason or "Rejected by reviewer."}
+    return json_response({"results": await asyncio.gather(*(decide(i, REJECTED, human_response) for i in request.ids))})
+
+
+# --- Non-LLM bulk API for front desk and integrations ---
+
+class SlotQuery(BaseModel):
+    desired_date: DateModel
+    doctor_name: Optional[DoctorName] = None
+    specialization: Optional[Specialization] = None
+
+class SlotQueryRequest(BaseModel):
+    queries: List[SlotQuery]
+    clinic_id: Optional[str] = None # default clinic if omitted
+
+class BookOperation(BaseModel):
+    op: Literal["book"]
+    desired_date: DateTimeModel
+    id_number: IdentificationNumberModel
+    doctor_name: DoctorName
+
+class CancelOperation(BaseModel):
+    op: Literal["cancel"]
+    date: DateTimeModel
+    id_number: IdentificationNumberModel
+    doctor_name: DoctorName
+
+class RescheduleOperation(BaseModel):
+    op: Literal["reschedule"]
+    old_date: DateTimeModel
+    new_date: DateTimeModel
+    id_number: IdentificationNumberModel
+    doctor_name: DoctorName
+
+class BatchRequest(BaseModel):
+    operations: List[Annotated[Union[BookOperation, CancelOperation, RescheduleOperation], Field(discriminator="op")]]
+    atomic: bool = True # all-or-nothing; otherwise the operations that succeed are committed
+    clinic_id: Optional[str] = None # the batch is committed to this one clinic's calendar
+
+def to_store_operation(operation):
+    if operation.op == "book":
+        return ("book", operation.doctor_name, operation.desired_date.minute, operation.id_number.id)
+    if operation.op == "cancel":
+        return ("cancel", operation.doctor_name, operation.date.minute, operation.id_number.id)
+    return ("reschedule", operation.doctor_name, operation.old_date.minute,
+            operation.new_date.minute, operation.id_number.id)
+
+def check_names(store, names):
+    """422 unless every (key, name) is one of the current clinic's doctors / specializations,
+    as the chat tools check them; the request schemas only know the union over all clinics."""
+    errors = [error for key, name in names if (error := unknown_name(key, name, store))]
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+# Plain `def` endpoints: FastAPI runs them in its threadpool, since they may wait on the store's file lock.
+@app.post("/slots/query")
+def slots_query_endpoint(request: SlotQueryRequest):
+    for query in request.queries:
+        if (query.doctor_name is None) == (query.specialization is None):
+            raise HTTPException(status_code=422, detail="Each query needs exactly one of 'doctor_name' or 'specialization'.")
+    with use_clinic(resolve_clinic(request.clinic_id)):
+        store = get_store()
+        check_names(store, [("doctors", q.doctor_name) if q.doctor_name else ("specializations", q.specialization)
+                            for q in request.queries])
+        results = []
+        for query in request.queries:
+            if query.doctor_name:
+                doctors = {query.doctor_name: list(store.free_slots(query.doctor_name, query.desired_date.minute))}
+            else:
+                doctors = {doctor: list(labels) for doctor, labels in
+                           store.free_slots_by_specialization(query.specialization, query.desired_date.minute)}
+            results.append({"query": query.model_dump(exclude_none=True), "available": doctors})
+    return {"results": results}
+
+@app.post("/appointments/batch")
+def appointments_batch_endpoint(request: BatchRequest):
+    with use_clinic(resolve_clinic(request.clinic_id)):
+        store = get_store()
+        check_names(store, [("doctors", op.doctor_name) for op in request.operations])
+        errors = store.apply_batch([to_store_operation(op) for op in request.operations], atomic=request.atomic)
+    committed = any(e is None for e in errors) and not (request.atomic and any(errors))
+    return {
+        "committed": committed,
+        "results": [{"index": i, "op": op.op, "ok": error is None, "error": str(error) if error else None}
+                    for i, (op, error) in enumerate(zip(request.operations, errors))],
+    }
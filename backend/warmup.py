@@ -0,0 +1,30 @@
+"""Pre-fork warmup: the expensive, fork-safe startup work, done once.
+
+Under `gunicorn -c gunicorn.conf.py backend.main:app` this runs in the master
+before the workers fork, so they share the imported modules and the loaded
+calendar copy-on-write and serve their first request without a cold start.
+Objects holding sockets or SQLite connections (the LLM client, checkpointer,
+caches) are not fork-safe; every worker builds its own with get_graph().
+"""
+import gc
+import time
+
+_warmed = False
+
+
+def warmup():
+    """Import the heavy dependencies and load every clinic's calendar; returns the seconds it took."""
+    global _warmed
+    started = time.perf_counter()
+    if not _warmed:
+        import langchain_groq  # noqa: F401  deferred by agents.Agents until the first LLM is built
+        import pandas  # noqa: F401  deferred by storage.slot_store until the first load
+        from storage.registry import get_registry
+        from storage.slot_store import get_store
+
+        for clinic in get_registry().clinics:
+            get_store(clinic)
+        # keep the warmed objects out of the collector, so workers don't dirty (and copy) their pages
+        gc.freeze()
+        _warmed = True
+    return time.perf_counter() - started
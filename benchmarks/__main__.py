@@ -0,0 +1,120 @@
+"""Benchmark suite. Every subcommand prints one JSON report (and writes it with --output).
+
+    python -m benchmarks generate --slots 1000000 --path /tmp/calendar.csv
+    python -m benchmarks tools --slots 100000 --output tools.json
+    python -m benchmarks graph --repeat 50 --checkpointer sqlite
+    python -m benchmarks load --threads 20 --requests 500 --llm-latency 0.2
+    python -m benchmarks startup --repeat 5
+    python -m benchmarks gateway --requests 330 --rpm 300 --error-rate 0.05
+    python -m benchmarks shards --writers 4 --bookings 200
+    python -m benchmarks validation --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+
+from benchmarks.report import emit
+from benchmarks.synthetic import generate_calendar
+
+
+def _calendar(args):
+    """Generate the synthetic calendar and make it the only clinic, before the tools build their schemas."""
+    from storage.registry import ClinicRegistry, set_registry
+    from storage.slot_store import SlotStore, set_store
+
+    path = args.path or os.path.join(tempfile.mkdtemp(), "availability.csv")
+    calendar = generate_calendar(path, args.slots, doctors=args.doctors, booked_ratio=args.booked_ratio, seed=args.seed)
+    # no doctor list: the tools accept whoever the synthetic calendar holds
+    set_registry(ClinicRegistry({"synthetic": {"name": "Synthetic clinic", "calendar": path}}))
+    set_store(SlotStore(path))
+    return calendar
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("generate", "tools", "graph", "load"):
+        command = commands.add_parser(name)
+        command.add_argument("--slots", type=int, default=10_000)
+        command.add_argument("--doctors", type=int, default=10)
+        command.add_argument("--booked-ratio", type=float, default=0.5)
+        command.add_argument("--seed", type=int, default=0)
+        command.add_argument("--path", help="where to write the synthetic calendar (default: a temp dir)")
+        command.add_argument("--output", help="also write the JSON report here")
+    startup = commands.add_parser("startup", help="import time, wall time and peak RSS of a cold start")
+    startup.add_argument("--repeat", type=int, default=3)
+    startup.add_argument("--modules", nargs="+", help="entry modules to import (default: the app's entry points)")
+    startup.add_argument("--output", help="also write the JSON report here")
+    gateway = commands.add_parser("gateway", help="LLM gateway under a burst, against a local fake provider")
+    gateway.add_argument("--requests", type=int, default=330)
+    gateway.add_argument("--rpm", type=int, default=300, help="the fake provider's requests-per-minute limit")
+    gateway.add_argument("--llm-latency", type=float, default=0.05)
+    gateway.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with a 503")
+    gateway.add_argument("--duplicates", type=int, default=50, help="identical concurrent prompts for coalescing")
+    gateway.add_argument("--output", help="also write the JSON report here")
+    shards = commands.add_parser("shards", help="concurrent booking processes: one calendar vs. a shard each")
+    shards.add_argument("--writers", type=int, default=4)
+    shards.add_argument("--bookings", type=int, default=200, help="bookings per writer")
+    shards.add_argument("--output", help="also write the JSON report here")
+    validation = commands.add_parser("validation", help="date/ID validation: per tool call and per imported column")
+    validation.add_argument("--rows", type=int, default=1_000_000)
+    validation.add_argument("--repeat", type=int, default=3)
+    validation.add_argument("--seed", type=int, default=0)
+    validation.add_argument("--output", help="also write the JSON report here")
+    commands.choices["tools"].add_argument("--repeat", type=int, default=200)
+    commands.choices["graph"].add_argument("--repeat", type=int, default=50)
+    commands.choices["graph"].add_argument("--turns", type=int, default=3)
+    commands.choices["load"].add_argument("--url", help="an already running backend (default: start one in-process)")
+    commands.choices["load"].add_argument("--threads", type=int, default=10)
+    commands.choices["load"].add_argument("--requests", type=int, default=200)
+    for name in ("graph", "load"):
+        commands.choices[name].add_argument("--llm-latency", type=float, default=0.0,
+                                            help="scripted LLM round-trip in seconds")
+        commands.choices[name].add_argument("--checkpointer", choices=["memory", "sqlite"], default="memory")
+    args = parser.parse_args(argv)
+
+    if args.command == "startup":
+        from benchmarks.startup_bench import ENTRY_MODULES, bench_startup
+        emit({"command": "startup", "startup": bench_startup(args.modules or ENTRY_MODULES, repeat=args.repeat)},
+             args.output)
+        return
+    if args.command == "gateway":
+        from benchmarks.gateway_bench import bench_gateway
+        emit({"command": "gateway", "gateway": bench_gateway(requests=args.requests, requests_per_minute=args.rpm,
+                                                             latency=args.llm_latency, error_rate=args.error_rate,
+                                                             duplicates=args.duplicates)}, args.output)
+        return
+
+    if args.command == "shards":
+        from benchmarks.shard_bench import bench_shards
+        emit({"command": "shards", "shards": bench_shards(writers=args.writers, bookings=args.bookings)}, args.output)
+        return
+
+    if args.command == "validation":
+        from benchmarks.validation_bench import bench_validation
+        emit({"command": "validation", "validation": bench_validation(rows=args.rows, repeat=args.repeat,
+                                                                      seed=args.seed)}, args.output)
+        return
+
+    calendar = _calendar(args)
+    report = {"command": args.command, "calendar": {k: v for k, v in calendar.items() if k != "roster"}}
+    if args.command == "tools":
+        from benchmarks.tools_bench import bench_load, bench_tools
+        report["load"] = bench_load(calendar["path"])
+        report["tools"] = bench_tools(calendar["path"], calendar["roster"], repeat=args.repeat, seed=args.seed)
+    elif args.command == "graph":
+        from benchmarks.graph_bench import bench_graph, bench_history
+        report["graph"] = bench_graph(repeat=args.repeat, turns=args.turns, latency=args.llm_latency,
+                                      checkpointer=args.checkpointer)
+        report["history"] = bench_history()
+    elif args.command == "load":
+        from benchmarks.load_test import bench_load_test
+        report["load_test"] = bench_load_test(url=args.url, threads=args.threads, requests=args.requests,
+                                              latency=args.llm_latency, checkpointer=args.checkpointer)
+    emit(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
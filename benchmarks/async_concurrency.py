@@ -0,0 +1,72 @@
+"""How many concurrent chats one event loop serves, async vs. blocking graph calls.
+
+Every chat costs one stub LLM round-trip of --latency seconds. With
+`graph.ainvoke` the round-trips overlap, so wall time stays near one
+latency as concurrency grows; calling the sync `graph.invoke` from the
+endpoint (the old behaviour) serializes them.
+
+    python -m benchmarks.async_concurrency --latency 0.2 --levels 1 10 100 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+
+import httpx
+from langchain_core.messages import HumanMessage
+
+import backend.main
+from agents.Agents import AgentNodes
+from benchmarks.fakes import StubChatModel
+from utils.config import TOOL_WORKERS
+from workflow.graph import build_graph
+
+
+async def _run_level(graph, mode, concurrency, client):
+    async def one_chat(i):
+        thread = {"configurable": {"thread_id": f"{mode}-{concurrency}-{i}"}}
+        state = {"messages": [HumanMessage(content="hello")]}
+        if mode == "async":
+            await graph.ainvoke(state, config=thread)
+        elif mode == "blocking":
+            graph.invoke(state, config=thread)
+        else:
+            response = await client.post("/chat", json={"user_input": "hello", "thread_id": thread["configurable"]["thread_id"]})
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_chat(i) for i in range(concurrency)))
+    wall = time.perf_counter() - started
+    return {"mode": mode, "concurrency": concurrency, "wall_seconds": round(wall, 3),
+            "chats_per_second": round(concurrency / wall, 1)}
+
+
+async def run(latency, levels, modes):
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=TOOL_WORKERS))
+    graph = build_graph(AgentNodes(llm=StubChatModel(latency=latency), cache=False))
+    backend.main.graph = graph
+    transport = httpx.ASGITransport(app=backend.main.app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode in modes:
+            for concurrency in levels:
+                results.append(await _run_level(graph, mode, concurrency, client))
+    return {"latency": latency, "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="stub LLM round-trip in seconds")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--modes", nargs="+", default=["endpoint", "async", "blocking"],
+                        choices=["endpoint", "async", "blocking"])
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(run(args.latency, args.levels, args.modes)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""A local OpenAI-compatible chat completions server for exercising the LLM gateway.
+
+It answers every request with a fixed reply after `latency` seconds, can
+enforce a requests-per-minute limit as a token bucket that refills
+continuously, like the hosted providers (HTTP 429 with a Retry-After header), and
+fail a fraction of requests with HTTP 503. Serves both /v1/chat/completions
+(OpenAI clients) and /openai/v1/chat/completions (Groq clients).
+"""
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeOpenAI:
+    def __init__(self, latency=0.0, requests_per_minute=0, error_rate=0.0, reply="Dr. John Doe is free at 09:00.",
+                 seed=0):
+        self.latency = latency
+        self.requests_per_minute = requests_per_minute
+        self.error_rate = error_rate
+        self.reply = reply
+        self.counts = {"requests": 0, "completed": 0, "rate_limited": 0, "errors": 0}
+        self._random = random.Random(seed)
+        self._allowance = float(requests_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.app = FastAPI()
+        for path in ("/v1/chat/completions", "/openai/v1/chat/completions"):
+            self.app.post(path)(self.completions)
+
+    def _admit(self):
+        """None if the request may proceed, else the error response."""
+        with self._lock:
+            self.counts["requests"] += 1
+            now, rate = time.monotonic(), self.requests_per_minute / 60
+            self._allowance = min(self.requests_per_minute, self._allowance + (now - self._updated) * rate)
+            self._updated = now
+            if self.requests_per_minute and self._allowance < 1:
+                self.counts["rate_limited"] += 1
+                retry_after = (1 - self._allowance) / rate
+                return JSONResponse({"error": {"message": "Rate limit reached", "type": "requests",
+                                               "code": "rate_limit_exceeded"}},
+                                    status_code=429, headers={"retry-after": f"{retry_after:.2f}"})
+            self._allowance -= 1
+            if self._random.random() < self.error_rate:
+                self.counts["errors"] += 1
+                return JSONResponse({"error": {"message": "Service unavailable", "type": "internal_server_error"}},
+                                    status_code=503)
+        return None
+
+    async def completions(self, request: Request):
+        body = await request.json()
+        rejected = self._admit()
+        if rejected is not None:
+            return rejected
+        await asyncio.sleep(self.latency)
+        with self._lock:
+            self.counts["completed"] += 1
+        prompt_tokens = sum(len(str(m.get("content") or "")) // 4 + 4 for m in body.get("messages", []))
+        completion_tokens = len(self.reply) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "created": int(time.time()), "model": body.get("model")}
+        if body.get("stream"):
+            return StreamingResponse(self._chunks(base, usage), media_type="text/event-stream")
+        return {**base, "object": "chat.completion", "usage": usage,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": self.reply}}]}
+
+    async def _chunks(self, base, usage):
+        words = self.reply.split(" ")
+        for i, word in enumerate(words):
+            delta = {"role": "assistant", "content": word if i == 0 else " " + word}
+            yield "data: " + json.dumps({**base, "object": "chat.completion.chunk",
+                                         "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}) + "\n\n"
+        yield "data: " + json.dumps({**base, "object": "chat.completion.chunk", "x_groq": {"usage": usage},
+                                     "usage": usage,
+                                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}) + "\n\n"
+        yield "data: [DONE]\n\n"
+
+
+def start_fake_openai(**options):
+    """Serve a FakeOpenAI on a background thread; returns (base_url, fake, server)."""
+    import uvicorn
+
+    fake = FakeOpenAI(**options)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(fake.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}", fake, server
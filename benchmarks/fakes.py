@@ -0,0 +1,76 @@
+"""Deterministic stand-ins for the Groq chat model, for offline benchmarks."""
+import asyncio
+import time
+import uuid
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class StubChatModel(BaseChatModel):
+    """Answers every prompt with `reply` after sleeping `latency` seconds,
+    like a provider round-trip that holds no CPU."""
+
+    latency: float = 0.0
+    reply: str = "ok"
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for i, word in enumerate(self.reply.split(" ")):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Replays `script` turn by turn: step i of a user turn (the number of AI
+    messages since the last human message) gets `script[i]`, a dict with
+    optional "content" and "tool_calls" ([{"name", "args"}]). The last step
+    repeats. Stateless, so one instance serves any number of threads."""
+
+    script: list
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _respond(self, messages):
+        step = 0
+        for message in reversed(messages):
+            if message.type == "human":
+                break
+            step += message.type == "ai"
+        entry = self.script[min(step, len(self.script) - 1)]
+        tool_calls = [{"name": call["name"], "args": call["args"], "id": f"call_{uuid.uuid4().hex}", "type": "tool_call"}
+                      for call in entry.get("tool_calls", [])]
+        message = AIMessage(content=entry.get("content", ""), tool_calls=tool_calls)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._respond(messages)
@@ -0,0 +1,75 @@
+"""Burst behaviour of the LLM gateway against the local fake OpenAI-compatible server.
+
+`direct` sends a burst of distinct prompts straight to the pooled model, `gateway`
+sends the same burst through an LLMGateway whose rate limiter knows the
+server's limit, and `coalesce` sends identical prompts concurrently to count
+how many upstream calls the gateway saves.
+"""
+import asyncio
+import time
+
+from langchain_core.messages import HumanMessage
+
+from agents.llm_gateway import LLMGateway, RateLimiter, make_chat_model
+from benchmarks.fake_openai import start_fake_openai
+from benchmarks.report import summarize
+from utils.metrics import metrics
+
+
+async def _burst(call, prompts):
+    latencies, errors = [], {}
+
+    async def one(prompt):
+        started = time.perf_counter()
+        try:
+            await call([HumanMessage(prompt)])
+        except Exception as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            return
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(prompt) for prompt in prompts))
+    return {"requests": len(prompts), "ok": len(latencies), "errors": errors,
+            "wall_seconds": round(time.perf_counter() - started, 3), "latency": summarize(latencies)}
+
+
+def _upstream(fake, before):
+    return {k: v - before[k] for k, v in fake.counts.items()}
+
+
+async def _scenarios(servers, requests, requests_per_minute, duplicates):
+    prompts = [f"When is doctor {i} available?" for i in range(requests)]
+    results = {}
+    for name, (url, fake, _) in servers.items():
+        # each scenario gets its own server, so rate-limit windows don't carry over
+        model = make_chat_model(base_url=url, api_key="stub")
+        metrics.reset()
+        before = dict(fake.counts)
+        if name == "direct":
+            result = await _burst(model.ainvoke, prompts)
+        elif name == "gateway":
+            gateway = LLMGateway(RateLimiter(requests_per_minute=requests_per_minute))
+            result = await _burst(lambda messages: gateway.ainvoke(model, messages), prompts)
+        else:
+            gateway = LLMGateway(RateLimiter(0, 0))
+            same = ["When is John Doe available tomorrow?"] * duplicates
+            result = await _burst(lambda messages: gateway.ainvoke(model, messages), same)
+        snapshot = metrics.snapshot()
+        results[name] = {**result, "upstream": _upstream(fake, before),
+                         "gateway_counters": {k: v for k, v in snapshot["counters"].items()
+                                              if k.startswith("llm_gateway")},
+                         "gateway_wait": snapshot["histograms"].get("llm_gateway_wait_seconds")}
+    return results
+
+
+def bench_gateway(requests=330, requests_per_minute=300, latency=0.05, error_rate=0.0, duplicates=50):
+    servers = {name: start_fake_openai(latency=latency, requests_per_minute=requests_per_minute,
+                                       error_rate=error_rate)
+               for name in ("direct", "gateway", "coalesce")}
+    try:
+        return {"server": {"requests_per_minute": requests_per_minute, "latency_s": latency, "error_rate": error_rate},
+                **asyncio.run(_scenarios(servers, requests, requests_per_minute, duplicates))}
+    finally:
+        for _, _, server in servers.values():
+            server.should_exit = True
@@ -0,0 +1,81 @@
+"""End-to-end build_graph() runs driven by a scripted chat model (no network)."""
+import os
+import tempfile
+import time
+
+import orjson
+
+from langchain_core.messages import HumanMessage
+
+from agents.Agents import AgentNodes
+from benchmarks.fakes import ScriptedChatModel
+from benchmarks.report import summarize, timed
+from storage.checkpoint import BoundedSqliteSaver
+from storage.message_log import encode_message
+from langgraph.checkpoint.memory import MemorySaver
+from workflow.graph import build_graph
+
+# One user turn: look up a doctor's day, then the next free slots, then answer.
+LOOKUP_SCRIPT = [
+    {"tool_calls": [{"name": "check_availability_by_doctor",
+                     "args": {"desired_date": {"date": "05-08-2024"}, "doctor_name": "john doe"}}]},
+    {"tool_calls": [{"name": "find_next_available",
+                     "args": {"after": {"date": "05-08-2024 08:00"}, "doctor_name": "john doe", "k": 3}}]},
+    {"content": "John Doe has openings on 05-08-2024; the earliest are listed above."},
+]
+
+
+def make_graph(script=LOOKUP_SCRIPT, latency=0.0, checkpointer="memory", fast_path=False):
+    if checkpointer == "sqlite":
+        saver = BoundedSqliteSaver.from_path(os.path.join(tempfile.mkdtemp(), "checkpoints.sqlite"))
+    else:
+        saver = MemorySaver()
+    nodes = AgentNodes(llm=ScriptedChatModel(script=script, latency=latency), cache=False)
+    return build_graph(nodes, checkpointer=saver, fast_path=fast_path)
+
+
+def bench_graph(repeat=50, turns=3, latency=0.0, checkpointer="memory"):
+    """Per-turn latency of scripted tool-calling turns, and of fast-path lookups."""
+    graph = make_graph(latency=latency, checkpointer=checkpointer)
+    conversation = iter(range(10 ** 9))
+
+    def scripted_conversation():
+        config = {"configurable": {"thread_id": f"bench-{next(conversation)}"}}
+        for _ in range(turns):
+            graph.invoke({"messages": [HumanMessage(content="When can I see john doe?")]}, config=config)
+
+    fast = make_graph(latency=latency, checkpointer=checkpointer, fast_path=True)
+
+    def fast_path_turn():
+        config = {"configurable": {"thread_id": f"fast-{next(conversation)}"}}
+        fast.invoke({"messages": [HumanMessage(content="is john doe free on 05-08-2024")]}, config=config)
+
+    return {
+        "checkpointer": checkpointer,
+        "llm_latency_s": latency,
+        "scripted_conversation": {"turns": turns, **summarize(timed(scripted_conversation, repeat))},
+        "fast_path_turn": summarize(timed(fast_path_turn, repeat)),
+    }
+
+
+def bench_history(turns=50, report_at=(1, 10, 25, 50)):
+    """Per-turn /chat payload as a conversation grows: re-encoding the whole history
+    (the `full_messages` response) vs. reading the turn's messages from the message log."""
+    graph = make_graph(checkpointer="sqlite")
+    log = graph.checkpointer.message_log
+    config = {"configurable": {"thread_id": "history"}}
+    cursor, results = 0, []
+    for turn in range(1, turns + 1):
+        output = graph.invoke({"messages": [HumanMessage(content="When can I see john doe?")]}, config=config)
+        started = time.perf_counter()
+        full = orjson.dumps([orjson.Fragment(encode_message(m)) for m in output["messages"]])
+        full_s = time.perf_counter() - started
+        started = time.perf_counter()
+        cursor, encoded = log.since("history", cursor)
+        delta = orjson.dumps([orjson.Fragment(body) for body in encoded])
+        delta_s = time.perf_counter() - started
+        if turn in report_at:
+            results.append({"turn": turn, "messages": len(output["messages"]),
+                            "full": {"bytes": len(full), "ms": round(full_s * 1000, 3)},
+                            "delta": {"bytes": len(delta), "ms": round(delta_s * 1000, 3)}})
+    return results
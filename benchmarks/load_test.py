@@ -0,0 +1,68 @@
+"""Load-test POST /chat with N concurrent client threads.
+
+Without --url the backend is started in-process on a free port, with the
+graph driven by the scripted chat model so no LLM is called.
+"""
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import uvicorn
+
+import backend.main
+from benchmarks.graph_bench import make_graph
+from benchmarks.report import summarize
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_backend(latency=0.0, checkpointer="memory"):
+    """Serve backend.main.app on a background thread; returns (base_url, server)."""
+    backend.main.graph = make_graph(latency=latency, checkpointer=checkpointer)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(backend.main.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}", server
+
+
+def run_load(url, threads=10, requests=200, message="When can I see john doe?"):
+    latencies = [[] for _ in range(threads)]
+    errors = [0] * threads
+
+    def worker(index):
+        with httpx.Client(base_url=url, timeout=60) as client:
+            for i in range(index, requests, threads):
+                started = time.perf_counter()
+                try:
+                    client.post("/chat", json={"user_input": message, "thread_id": f"load-{i}"}).raise_for_status()
+                except httpx.HTTPError:
+                    errors[index] += 1
+                    continue
+                latencies[index].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    wall = time.perf_counter() - started
+    completed = [d for per_thread in latencies for d in per_thread]
+    return {"threads": threads, "requests": requests, "errors": sum(errors), "wall_seconds": round(wall, 3),
+            "throughput_rps": round(len(completed) / wall, 1), "latency": summarize(completed)}
+
+
+def bench_load_test(url=None, threads=10, requests=200, latency=0.0, checkpointer="memory"):
+    server = None
+    if url is None:
+        url, server = start_backend(latency=latency, checkpointer=checkpointer)
+    try:
+        return {"url": url, "llm_latency_s": latency, **run_load(url, threads, requests)}
+    finally:
+        if server is not None:
+            server.should_exit = True
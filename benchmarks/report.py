@@ -0,0 +1,55 @@
+"""Shared helpers for benchmark reports: latency percentiles, peak RSS, run metadata."""
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def summarize(seconds):
+    """p50/p95/p99/mean/max in milliseconds for a list of durations in seconds."""
+    if not len(seconds):
+        return {"count": 0}
+    ms = np.asarray(seconds) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"count": int(ms.size), "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3), "mean_ms": round(float(ms.mean()), 3), "max_ms": round(float(ms.max()), 3)}
+
+
+def timed(fn, repeat):
+    """Call fn() `repeat` times; returns the per-call durations in seconds."""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "commit": commit or None,
+            "python": platform.python_version(), "platform": platform.platform()}
+
+
+def emit(report, output=None):
+    """Print the report as JSON, and also write it to `output` if given."""
+    report = {"environment": environment(), **report, "peak_rss_mb": peak_rss_mb()}
+    text = json.dumps(report, indent=2, default=str)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return report
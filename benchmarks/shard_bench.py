@@ -0,0 +1,66 @@
+"""Booking throughput of concurrent writer processes: all on one calendar vs. one clinic shard each.
+
+Every writer books `bookings` free slots of its own doctors, so nothing
+conflicts; the difference is only whether they queue on the same file lock
+and journal, or each commits to its own shard.
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_calendar
+from storage.slot_store import SlotStore, from_minute
+
+
+def _free_slots(path, doctors, count):
+    """[(doctor, datetime)] of `count` free slots among `doctors`."""
+    store = SlotStore(path)
+    codes = [store.doctors.index(d) for d in doctors]
+    rows = np.flatnonzero(store.available & np.isin(store.doctor, codes))[:count]
+    return [(store.doctors[store.doctor[r]], from_minute(store.minute[r])) for r in rows]
+
+
+def _writer(path, slots, start, results):
+    store = SlotStore(path)
+    start.wait()
+    started = time.perf_counter()
+    for doctor, dt in slots:
+        store.book(doctor, dt, 1234567)
+    results.put(time.perf_counter() - started)
+
+
+def _run(jobs):
+    start, results = multiprocessing.Event(), multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_writer, args=(path, slots, start, results)) for path, slots in jobs]
+    for worker in workers:
+        worker.start()
+    time.sleep(0.5)  # let every writer map its calendar before the clock starts
+    started = time.perf_counter()
+    start.set()
+    for worker in workers:
+        worker.join()
+    wall = time.perf_counter() - started
+    bookings = sum(len(slots) for _, slots in jobs)
+    return {"writers": len(jobs), "bookings": bookings, "wall_seconds": round(wall, 3),
+            "bookings_per_second": round(bookings / wall, 1)}
+
+
+def bench_shards(writers=4, bookings=200, doctors_per_writer=2, slots_per_doctor=2000):
+    directory = tempfile.mkdtemp()
+    doctors = writers * doctors_per_writer
+    shared = os.path.join(directory, "shared.csv")
+    roster = generate_calendar(shared, doctors * slots_per_doctor, doctors=doctors, booked_ratio=0.2)["roster"]
+    names = [name for name, _ in roster]
+
+    shared_jobs, sharded_jobs = [], []
+    for i in range(writers):
+        own = names[i * doctors_per_writer:(i + 1) * doctors_per_writer]
+        shared_jobs.append((shared, _free_slots(shared, own, bookings)))
+        # a clinic of its own, with as many doctors and slots
+        shard = os.path.join(directory, f"clinic{i}.csv")
+        generate_calendar(shard, doctors_per_writer * slots_per_doctor, doctors=doctors_per_writer, booked_ratio=0.2)
+        sharded_jobs.append((shard, _free_slots(shard, names[:doctors_per_writer], bookings)))
+    return {"one_calendar": _run(shared_jobs), "one_shard_per_writer": _run(sharded_jobs)}
@@ -0,0 +1,66 @@
+"""Cold-start cost of the entry modules: `python -X importtime` totals, wall time and peak RSS, each in a fresh interpreter."""
+import os
+import re
+import subprocess
+import sys
+import time
+
+from benchmarks.report import summarize
+
+ENTRY_MODULES = ["tools.tools", "agents.Agents", "workflow.graph", "backend.main", "UI.app"]
+
+# after the imports: construct the graph, as the first request (or worker startup) would
+BUILD_GRAPH = "from workflow.graph import get_graph; get_graph()"
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+# VmHWM restarts at exec; ru_maxrss of a child would include the (larger) benchmark process it forked from
+_PEAK_RSS = """
+try:
+    print(next(line.split()[1] for line in open("/proc/self/status") if line.startswith("VmHWM:")))
+except OSError:
+    import resource, sys
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1))
+"""
+
+
+def _run(code, env):
+    """Run `code` under -X importtime in a child; returns (stderr, wall seconds, peak RSS in MB)."""
+    started = time.perf_counter()
+    child = subprocess.run([sys.executable, "-X", "importtime", "-c", code + "\n" + _PEAK_RSS], env=env,
+                           capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if child.returncode:
+        raise RuntimeError(f"{code!r} failed:\n{child.stderr[-2000:]}")
+    peak_kb = int(child.stdout.split()[-1])
+    return child.stderr, wall, round(peak_kb / 1024, 1)
+
+
+def parse_importtime(stderr, top=10):
+    """Total import time and the slowest modules by self time, in milliseconds."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            rows.append((module, int(own), int(cumulative), len(indent)))
+    total_us = sum(own for _, own, _, _ in rows)
+    slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+    return {"modules": len(rows), "total_ms": round(total_us / 1000, 1),
+            "slowest_self_ms": {module: round(own / 1000, 1) for module, own, _, _ in slowest}}
+
+
+def bench_startup(modules=ENTRY_MODULES, repeat=3, build_graph=True):
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))}
+    env.setdefault("GROQ_API_KEY", "stub")
+    cases = {module: f"import {module}" for module in modules}
+    if build_graph:
+        cases["workflow.graph+get_graph()"] = BUILD_GRAPH
+    results = {}
+    for name, code in cases.items():
+        runs = [_run(code, env) for _ in range(repeat)]
+        stderr, _, _ = runs[-1]
+        results[name] = {"wall": summarize([wall for _, wall, _ in runs]),
+                         "peak_rss_mb": max(peak for _, _, peak in runs),
+                         "importtime": parse_importtime(stderr)}
+    return results
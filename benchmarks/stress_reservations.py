@@ -0,0 +1,145 @@
+"""Concurrent booking stress test for the slot store.
+
+Runs P processes x T threads against one calendar on disk and checks that
+no slot is ever double-booked and that concurrent reschedules never lose
+or duplicate an appointment.
+
+    python -m benchmarks.stress_reservations --processes 4 --threads 8 --attempts 4000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from storage.slot_store import SlotStore, SlotError, DATETIME_FORMAT
+
+DOCTOR = "john doe"
+FIRST_SLOT = datetime(2024, 8, 5, 8, 0)
+
+
+def write_calendar(path, slots):
+    times = [FIRST_SLOT + timedelta(minutes=30 * i) for i in range(slots)]
+    pd.DataFrame({
+        "date_slot": [t.strftime(DATETIME_FORMAT) for t in times],
+        "specialization": "general_dentist",
+        "doctor_name": DOCTOR,
+        "is_available": True,
+        "patient_to_attend": None,
+    }).to_csv(path, index=False)
+    return times
+
+
+def _book_worker(path, hot, worker, threads, attempts, compact_every):
+    store = SlotStore(path, compact_every=compact_every)
+    rng = random.Random(worker)
+
+    def attempt(i):
+        patient_id = 10_000_000 + worker * attempts + i
+        dt = rng.choice(hot)
+        try:
+            store.book(DOCTOR, dt, patient_id)
+            return dt.strftime(DATETIME_FORMAT), patient_id
+        except SlotError:
+            return None
+
+    with ThreadPoolExecutor(threads) as pool:
+        return [r for r in pool.map(attempt, range(attempts)) if r]
+
+
+def _reschedule_worker(path, times, owned, threads, moves, compact_every):
+    """Move this worker's own patients to random slots; each thread owns a disjoint subset."""
+    store = SlotStore(path, compact_every=compact_every)
+    patients = sorted(owned)
+
+    def mover(t):
+        rng = random.Random(t)
+        mine = {p: datetime.strptime(owned[p], DATETIME_FORMAT) for p in patients[t::threads]}
+        moved = 0
+        for _ in range(moves // threads if mine else 0):
+            patient_id = rng.choice(list(mine))
+            new_dt = rng.choice(times)
+            try:
+                store.reschedule(DOCTOR, mine[patient_id], new_dt, patient_id)
+            except SlotError:
+                continue
+            mine[patient_id] = new_dt
+            moved += 1
+        return moved
+
+    with ThreadPoolExecutor(threads) as pool:
+        return sum(pool.map(mover, range(threads)))
+
+
+def run(processes, threads, attempts, slots, hot_slots, compact_every):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "availability.csv")
+        times = write_calendar(path, slots)
+        per_worker = attempts // processes
+
+        started = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.starmap(_book_worker, [(path, times[:hot_slots], w, threads, per_worker, compact_every)
+                                                  for w in range(processes)])
+        book_seconds = time.perf_counter() - started
+        wins = [r for rs in results for r in rs]
+        per_slot = Counter(slot for slot, _ in wins)
+        double_booked = sorted(slot for slot, n in per_slot.items() if n > 1)
+
+        final = SlotStore(path)
+        expected = {slot: patient_id for slot, patient_id in wins}
+        actual = {dt.strftime(DATETIME_FORMAT): p for p in expected.values()
+                  for _, dt in final.appointments_for(p)}
+        mismatched = sorted(set(expected.items()) ^ set(actual.items()))
+
+        started = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            moved = sum(pool.starmap(_reschedule_worker, [
+                (path, times, {p: slot for slot, p in rs}, threads, per_worker // 4, compact_every)
+                for rs in results]))
+        reschedule_seconds = time.perf_counter() - started
+        final = SlotStore(path)
+        per_patient = {p: len(final.appointments_for(p)) for p in expected.values()}
+        lost_or_duplicated = sorted(p for p, n in per_patient.items() if n != 1)
+
+    return {
+        "processes": processes,
+        "threads": threads,
+        "attempts": per_worker * processes,
+        "slots": slots,
+        "hot_slots": hot_slots,
+        "bookings": len(wins),
+        "book_seconds": round(book_seconds, 3),
+        "double_booked": double_booked,
+        "journal_mismatches": mismatched,
+        "reschedules": moved,
+        "reschedule_seconds": round(reschedule_seconds, 3),
+        "lost_or_duplicated_patients": lost_or_duplicated,
+        "ok": not (double_booked or mismatched or lost_or_duplicated),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=4000)
+    parser.add_argument("--slots", type=int, default=200)
+    parser.add_argument("--hot-slots", type=int, default=50, help="slots every booking thread competes for")
+    parser.add_argument("--compact-every", type=int, default=50)
+    args = parser.parse_args(argv)
+    report = run(args.processes, args.threads, args.attempts, args.slots, args.hot_slots, args.compact_every)
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Synthetic calendars in the Data/availability.csv schema, of any size."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from storage.registry import get_registry
+from storage.slot_store import DATETIME_FORMAT
+
+SLOTS_PER_DAY = 18  # 08:00 .. 16:30 every 30 minutes, like the sample data
+FIRST_DAY = datetime(2024, 8, 5)
+
+
+def doctor_roster(doctors):
+    """[(doctor_name, specialization)]: the registry's doctors first, then numbered extras."""
+    registry = get_registry()
+    names = list(registry.clinic().get("doctors") or [])
+    names += [f"doctor {i:05d}" for i in range(len(names), doctors)]
+    specializations = registry.clinic().get("specializations") or ["general_dentist"]
+    return [(name, specializations[i % len(specializations)]) for i, name in enumerate(names[:doctors])]
+
+
+def generate_calendar(path, slots, doctors=10, booked_ratio=0.5, seed=0):
+    """Write ~`slots` rows spread over `doctors` doctors; returns the roster and the day range."""
+    rng = np.random.default_rng(seed)
+    roster = doctor_roster(doctors)
+    days = max(1, -(-slots // (doctors * SLOTS_PER_DAY)))
+
+    day_offsets = np.repeat(np.arange(days), SLOTS_PER_DAY) * 24 * 60
+    slot_offsets = np.tile(8 * 60 + 30 * np.arange(SLOTS_PER_DAY), days)
+    minutes = (day_offsets + slot_offsets)[None, :].repeat(doctors, axis=0).ravel()[:slots]
+    doctor_index = np.repeat(np.arange(doctors), days * SLOTS_PER_DAY)[:slots]
+
+    booked = rng.random(slots) < booked_ratio
+    patients = np.where(booked, rng.integers(1_000_000, 99_999_999, slots), 0)
+    date_slot = pd.to_datetime(np.datetime64(FIRST_DAY, "m") + minutes.astype("timedelta64[m]"))
+    names = np.array([name for name, _ in roster], dtype=object)
+    specs = np.array([spec for _, spec in roster], dtype=object)
+
+    pd.DataFrame({
+        "date_slot": date_slot.strftime(DATETIME_FORMAT),
+        "specialization": specs[doctor_index],
+        "doctor_name": names[doctor_index],
+        "is_available": ~booked,
+        "patient_to_attend": pd.arrays.IntegerArray(patients, mask=~booked),
+    }).to_csv(path, index=False)
+    return {"path": path, "slots": slots, "doctors": doctors, "days": days, "roster": roster}
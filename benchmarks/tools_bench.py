@@ -0,0 +1,96 @@
+"""Micro-benchmarks: calendar load and every tool, against one synthetic calendar."""
+import itertools
+import os
+import random
+import time
+
+import numpy as np
+
+from benchmarks.report import summarize, timed
+from storage.slot_store import SlotStore, set_store, from_minute, DATE_FORMAT, DATETIME_FORMAT
+from tools.tools import (check_availability_by_doctor, check_availability_by_specialization,
+                         find_next_available, set_appointment, cancel_appointment, reschedule_appointment)
+
+
+def _known_doctor_rows(store, roster):
+    """Rows of doctors the tools accept (their Literal list), split into free and booked."""
+    known = [store.doctors.index(name) for name, _ in roster[:10] if name in store.doctors]
+    rows = np.flatnonzero(np.isin(store.doctor, known))
+    return rows[store.available[rows]], rows[~store.available[rows]]
+
+
+def bench_load(path, repeat=3):
+    """Cold load: importing the CSV into a binary snapshot, and mapping an existing snapshot."""
+    snapshot = path + ".slots"
+
+    def import_csv():
+        os.remove(snapshot)
+        SlotStore(path)
+
+    SlotStore(path)
+    return {"import_csv": summarize(timed(import_csv, repeat)),
+            "map_snapshot": summarize(timed(lambda: SlotStore(path), repeat)),
+            "snapshot_bytes_per_slot": round(os.path.getsize(snapshot) / max(1, len(SlotStore(path).minute)), 2),
+            "csv_bytes_per_slot": round(os.path.getsize(path) / max(1, len(SlotStore(path).minute)), 2)}
+
+
+def bench_tools(path, roster, repeat=200, seed=0):
+    rng = random.Random(seed)
+    store = SlotStore(path, compact_every=10 ** 9)  # keep compaction out of per-call numbers
+    set_store(store)
+    free_rows, _ = _known_doctor_rows(store, roster)
+    free_rows = free_rows.tolist()
+    rng.shuffle(free_rows)
+    doctors = [(name, spec) for name, spec in roster[:10]]
+
+    def slot(row):
+        return {"date": from_minute(store.minute[row]).strftime(DATETIME_FORMAT)}
+
+    def day(row):
+        return {"date": from_minute(store.minute[row]).strftime(DATE_FORMAT)}
+
+    def doctor_of(row):
+        return store.doctors[store.doctor[row]]
+
+    sample = itertools.cycle(free_rows[:1000])
+    results = {}
+    results["check_availability_by_doctor"] = summarize(timed(lambda: check_availability_by_doctor.invoke(
+        {"desired_date": day(next(sample)), "doctor_name": rng.choice(doctors)[0]}), repeat))
+    results["check_availability_by_specialization"] = summarize(timed(lambda: check_availability_by_specialization.invoke(
+        {"desired_date": day(next(sample)), "specialization": rng.choice(doctors)[1]}), repeat))
+    results["find_next_available"] = summarize(timed(lambda: find_next_available.invoke(
+        {"after": slot(next(sample)), "specialization": rng.choice(doctors)[1], "k": 5}), repeat))
+
+    to_book = iter(free_rows[1000:1000 + repeat])
+    booked = []
+
+    def book():
+        row = next(to_book)
+        patient = 10_000_000 + row % 89_999_999
+        set_appointment.invoke({"desired_date": slot(row), "id_number": {"id": patient}, "doctor_name": doctor_of(row)})
+        booked.append((row, patient))
+
+    results["set_appointment"] = summarize(timed(book, repeat))
+
+    moved = []
+
+    def reschedule():
+        row, patient = booked.pop()
+        (new_dt, doctor, _), = store.next_free([doctor_of(row)], from_minute(store.minute[row]), 365, 1)
+        reschedule_appointment.invoke({"old_date": slot(row), "new_date": {"date": new_dt.strftime(DATETIME_FORMAT)},
+                                       "id_number": {"id": patient}, "doctor_name": doctor})
+        moved.append((store.find_slot(doctor, new_dt), patient))
+
+    results["reschedule_appointment"] = summarize(timed(reschedule, min(repeat // 4, len(booked))))
+    remaining = booked + moved
+
+    def cancel():
+        row, patient = remaining.pop()
+        cancel_appointment.invoke({"date": slot(row), "id_number": {"id": patient}, "doctor_name": doctor_of(row)})
+
+    results["cancel_appointment"] = summarize(timed(cancel, len(remaining)))
+
+    started = time.perf_counter()
+    store.compact()
+    results["compact_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return results
@@ -0,0 +1,94 @@
+"""Date and ID validation: one value at a time in the tool models, and whole columns on calendar import.
+
+`single` times what a tool call pays per argument: the former regex check plus
+strptime (done once in the validator and again in the tool), against the
+cached parser the models now share. `bulk` validates an imported calendar's
+date_slot and patient_to_attend columns row by row through the models,
+with pandas, and with the vectorized column validators.
+"""
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from benchmarks.report import summarize, timed
+from tools.base_models import DateTimeModel, IdentificationNumberModel, parse_datetime
+
+_OLD_PATTERN = re.compile(r"^\d{2}-\d{2}-\d{4} \d{2}:\d{2}$")
+
+
+def _old_parse(value):
+    """The check each tool argument used to get: a regex in the validator, then strptime (twice)."""
+    if not _OLD_PATTERN.match(value):
+        raise ValueError("Expected format: 'DD-MM-YYYY HH:MM'")
+    datetime.strptime(value, "%d-%m-%Y %H:%M")
+    return datetime.strptime(value, "%d-%m-%Y %H:%M")
+
+
+def _values(rows, seed):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, 8, 0)
+    dates = [(start + timedelta(minutes=30 * rng.randrange(200_000))).strftime("%d-%m-%Y %H:%M") for _ in range(rows)]
+    ids = [float(rng.randrange(1_000_000, 99_999_999)) if rng.random() < 0.5 else float("nan") for _ in range(rows)]
+    return dates, ids
+
+
+def _per_call_us(fn, values, repeat):
+    """Mean microseconds per fn(value), best of `repeat` passes over `values`."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for value in values:
+            fn(value)
+        best = min(best, time.perf_counter() - started)
+    return round(best / len(values) * 1e6, 3)
+
+
+def bench_single(values, repeat=5):
+    def cold(value):
+        parse_datetime.cache_clear()
+        return parse_datetime(value)
+
+    hot = values[:64]  # a conversation keeps coming back to a handful of slots
+    return {"old_regex_strptime_us": _per_call_us(_old_parse, values, repeat),
+            "parse_uncached_us": _per_call_us(cold, values, repeat),
+            "parse_cached_us": _per_call_us(parse_datetime, hot * (len(values) // len(hot)), repeat),
+            "model_and_dt_us": _per_call_us(lambda v: DateTimeModel(date=v).dt, values, repeat),
+            "model_and_minute_us": _per_call_us(lambda v: DateTimeModel(date=v).minute, values, repeat)}
+
+
+def bench_bulk(dates, ids, repeat=3):
+    import pandas as pd
+
+    column, id_column = pd.Series(dates), pd.Series(ids)
+
+    def per_row():
+        parse_datetime.cache_clear()
+        [DateTimeModel(date=v).minute for v in dates]
+        [IdentificationNumberModel(id=int(v)).id for v in ids if v == v]
+
+    def with_pandas():
+        minutes = pd.to_datetime(column, format="%d-%m-%Y %H:%M").to_numpy(dtype="datetime64[m]").astype(np.int64)
+        id_column.fillna(0).to_numpy(dtype=np.int64)
+        return minutes
+
+    def vectorized():
+        minutes = DateTimeModel.minutes(column)
+        IdentificationNumberModel.ids(id_column)
+        return minutes
+
+    assert np.array_equal(with_pandas(), vectorized())
+    report = {"rows": len(dates),
+              "per_row_models": summarize(timed(per_row, 1)),
+              "pandas_to_datetime": summarize(timed(with_pandas, repeat)),
+              "vectorized_models": summarize(timed(vectorized, repeat))}
+    report["rows_per_second"] = {name: round(len(dates) / (report[name]["p50_ms"] / 1000.0))
+                                 for name in ("per_row_models", "pandas_to_datetime", "vectorized_models")}
+    return report
+
+
+def bench_validation(rows=1_000_000, repeat=3, seed=0):
+    dates, ids = _values(rows, seed)
+    return {"single": bench_single(dates[:20_000], repeat=repeat), "bulk": bench_bulk(dates, ids, repeat=repeat)}
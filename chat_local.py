@@ -1,6 +1,7 @@
-from workflow.graph import build_graph
+from workflow.graph import get_graph
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 from langchain_core.messages import BaseMessage
+from langgraph.types import Command
 from langchain.callbacks.tracers import LangChainTracer
 import os
 from utils.config import LANGSMITH_API_KEY,LANGSMITH_PROJECT
@@ -28,9 +29,24 @@ def get_message_emoji(msg: BaseMessage):
     else:
         return "📦 (Other)"
 
+def human_review_prompt(review):
+    print(f"{Colors.WARNING}Approval required for tool calls:{Colors.END}")
+    for call in review["tool_calls"]:
+        print(f"  - {call['name']}({call['args']})")
+    print("Type your action: 'continue' or 'reject'")
+
+    action = input("Action: ").strip().lower()
+
+    if action == "reject":
+        reject = input("Enter reject message: ")
+        return {"action": "reject", "data": reject}
+    else:
+        # Default to continue
+        return {"action": "continue"}
+
 def main():
     print(f"{Colors.BOLD}🤖 Welcome to the Multi-Agent Assistant! Type 'exit' to quit.{Colors.END}\n")
-    graph = build_graph()
+    graph = get_graph()
     os.environ["LANGSMITH_API_KEY"] = LANGSMITH_API_KEY
     
     os.environ["LANGSMITH_PROJECT"] = LANGSMITH_PROJECT
@@ -47,15 +63,16 @@ def main():
         }
 
         tracer = LangChainTracer()
-        try:
-            output = graph.invoke(
-        initial_state,
-        config={
+        config = {
             "configurable": {"thread_id": "new-test-thread-id"},
             "callbacks": [tracer],
             "run_name": "Appointment Assistant with Review"
         }
-    )
+        try:
+            output = graph.invoke(initial_state, config=config)
+            # Protected tool calls pause the graph; answer each review and resume
+            while (snapshot := graph.get_state(config)).interrupts:
+                output = graph.invoke(Command(resume=human_review_prompt(snapshot.interrupts[0].value)), config=config)
             print(f"\n{Colors.BOLD}📡 Assistant Conversation Output:{Colors.END}")
 
             for msg in output["messages"]:
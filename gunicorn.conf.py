@@ -0,0 +1,14 @@
+# Pre-forking production server for the backend:
+#   gunicorn -c gunicorn.conf.py backend.main:app
+import os
+
+from backend.warmup import warmup
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True # import the app, and warm it up, once in the master
+
+
+def on_starting(server):
+    server.log.info("Warmed up in %.2fs", warmup())
@@ -1,3 +1,5 @@
+import re
+
 from pydantic import BaseModel
 from typing_extensions import List,Optional,TypedDict,Annotated
 from langgraph.graph.message import add_messages
@@ -7,7 +9,14 @@ ralph_system_prompt = "You are a medical appointment assistant. Help patients sc
 
 protected_tools = ["set_appointment", "cancel_appointment", "reschedule_appointment"]
 
+# a user message asking to change an appointment; it never gets a shortcut answer (fast path,
+# similar cached answer) and always reaches the LLM, which handles review and confirmation
+change_request = re.compile(r"\b(book|cancel|reschedul|schedul|move|change|set|confirm|delete|remove|appointment)\w*")
+
 class MediState(BaseModel):
     messages: Annotated[List[BaseMessage], add_messages] = []
     protected_tools: List[str] = protected_tools
-    yolo_mode: bool = False
\ No newline at end of file
+    yolo_mode: bool = False
+    summary: str = ""
+    summarized_upto: int = 0
+    clinic_id: Optional[str] = None # registry clinic the conversation books at; None = the default clinic
\ No newline at end of file
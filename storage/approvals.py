@@ -0,0 +1,72 @@
+import json
+import sqlite3
+import threading
+import time
+
+from utils.config import APPROVALS_DB
+
+PENDING, APPROVED, REJECTED = "pending", "approved", "rejected"
+
+
+class ApprovalQueue:
+    """Tool calls waiting for a human decision, one row per graph interrupt.
+
+    Rows are keyed by the interrupt id and survive restarts, so a reviewer
+    can work through the backlog from any worker. `claim` moves a row out
+    of `pending` atomically: of two reviewers deciding the same call, only
+    one gets to resume its thread.
+    """
+
+    def __init__(self, path=APPROVALS_DB):
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS approvals (
+                       id TEXT PRIMARY KEY, thread_id TEXT NOT NULL, request TEXT NOT NULL,
+                       status TEXT NOT NULL, created_at REAL NOT NULL, decided_at REAL, decision TEXT)""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS approvals_status ON approvals (status, created_at)")
+
+    @staticmethod
+    def _row(row):
+        return {"id": row["id"], "thread_id": row["thread_id"], "request": json.loads(row["request"]),
+                "status": row["status"], "created_at": row["created_at"], "decided_at": row["decided_at"],
+                "decision": json.loads(row["decision"]) if row["decision"] else None}
+
+    def add(self, interrupt_id, thread_id, request):
+        """Queue an interrupt; re-adding one that is already known is a no-op."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO approvals (id, thread_id, request, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (interrupt_id, thread_id, json.dumps(request, default=str), PENDING, time.time()))
+
+    def get(self, approval_id):
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM approvals WHERE id = ?", (approval_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def pending(self, thread_id=None, limit=100):
+        query, args = "SELECT * FROM approvals WHERE status = ?", [PENDING]
+        if thread_id is not None:
+            query, args = query + " AND thread_id = ?", args + [thread_id]
+        with self._lock:
+            rows = self.conn.execute(query + " ORDER BY created_at LIMIT ?", args + [limit]).fetchall()
+        return [self._row(row) for row in rows]
+
+    def claim(self, approval_id, status, decision):
+        """Record the decision if the row is still pending; returns the row, or None if it wasn't."""
+        with self._lock, self.conn:
+            updated = self.conn.execute(
+                "UPDATE approvals SET status = ?, decided_at = ?, decision = ? WHERE id = ? AND status = ?",
+                (status, time.time(), json.dumps(decision), approval_id, PENDING)).rowcount
+            row = self.conn.execute("SELECT * FROM approvals WHERE id = ?", (approval_id,)).fetchone()
+        return self._row(row) if updated else None
+
+    def resolve_thread(self, thread_id, status, decision):
+        """Decide every pending row of a thread (its run was resumed directly, e.g. via /chat)."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE approvals SET status = ?, decided_at = ?, decision = ? WHERE thread_id = ? AND status = ?",
+                (status, time.time(), json.dumps(decision), thread_id, PENDING))
@@ -0,0 +1,111 @@
+import asyncio
+import sqlite3
+import time
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from storage.message_log import MessageLog
+from utils.config import (CHECKPOINTER, CHECKPOINT_DB, CHECKPOINT_MAX_PER_THREAD,
+                          CHECKPOINT_TTL_SECONDS, CHECKPOINT_SWEEP_EVERY)
+
+
+class BoundedSqliteSaver(SqliteSaver):
+    """SQLite checkpointer with a per-thread checkpoint cap and idle-thread TTL.
+
+    Every put keeps only the newest `max_checkpoints` of that thread, and
+    every `sweep_every` puts threads idle for longer than `ttl_seconds` are
+    deleted. The database is in WAL mode, so any worker process can resume
+    any thread. Async methods run the sync ones in a worker thread.
+
+    Alongside each root checkpoint, the thread's new messages are appended
+    to `message_log` pre-encoded, for delta responses from the API.
+    """
+
+    def __init__(self, conn, *, max_checkpoints=CHECKPOINT_MAX_PER_THREAD,
+                 ttl_seconds=CHECKPOINT_TTL_SECONDS, sweep_every=CHECKPOINT_SWEEP_EVERY, serde=None):
+        super().__init__(conn, serde=serde)
+        self.max_checkpoints = max_checkpoints
+        self.ttl_seconds = ttl_seconds
+        self.sweep_every = sweep_every
+        self._puts = 0
+        self.message_log = MessageLog(conn, self.lock)
+
+    @classmethod
+    def from_path(cls, path=CHECKPOINT_DB, **kwargs):
+        return cls(sqlite3.connect(path, check_same_thread=False, timeout=30), **kwargs)
+
+    def setup(self):
+        if self.is_setup:
+            return
+        super().setup()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS thread_activity (thread_id TEXT PRIMARY KEY, last_seen REAL NOT NULL)")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS thread_activity_last_seen ON thread_activity (last_seen)")
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self.cursor() as cur:
+            cur.execute("INSERT OR REPLACE INTO thread_activity (thread_id, last_seen) VALUES (?, ?)",
+                        (thread_id, time.time()))
+            cur.execute(
+                """DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                       SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                       ORDER BY checkpoint_id DESC LIMIT ?)""",
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.max_checkpoints))
+            if cur.rowcount:
+                cur.execute(
+                    """DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                           SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)""",
+                    (thread_id, checkpoint_ns, thread_id, checkpoint_ns))
+        messages = checkpoint["channel_values"].get("messages")
+        if not checkpoint_ns and "messages" in new_versions and messages is not None:
+            self.message_log.append(thread_id, messages)
+        self._puts += 1
+        if self._puts % self.sweep_every == 0:
+            self.evict_idle()
+        return saved
+
+    def evict_idle(self):
+        """Delete every thread whose last checkpoint is older than the TTL; returns how many."""
+        cutoff = time.time() - self.ttl_seconds
+        with self.cursor() as cur:
+            idle = [row[0] for row in cur.execute(
+                "SELECT thread_id FROM thread_activity WHERE last_seen < ?", (cutoff,))]
+        for thread_id in idle:
+            self.delete_thread(thread_id)
+        return len(idle)
+
+    def delete_thread(self, thread_id):
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (str(thread_id),))
+        self.message_log.delete(str(thread_id))
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for item in await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit))):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def make_checkpointer(kind=CHECKPOINTER):
+    """The checkpointer named by the CHECKPOINTER setting: 'sqlite' (default) or 'memory'."""
+    if kind == "memory":
+        return MemorySaver()
+    if kind == "sqlite":
+        return BoundedSqliteSaver.from_path()
+    raise ValueError(f"Unknown CHECKPOINTER {kind!r}; expected 'sqlite' or 'memory'")
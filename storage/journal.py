@@ -0,0 +1,58 @@
+import json
+import os
+
+
+class Journal:
+    """Append-only, fsync'd log of slot mutations, one JSON record per line.
+
+    A torn final line (crash mid-append) is ignored on replay and
+    overwritten by the next append.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        open(path, "ab").close()
+
+    def signature(self):
+        """(inode, size) — the inode changes whenever the journal is reset."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return (None, 0)
+        return (st.st_ino, st.st_size)
+
+    def append(self, record, offset=None):
+        line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+        with open(self.path, "r+b") as f:
+            if offset is None:
+                f.seek(0, os.SEEK_END)
+            else:
+                f.seek(offset)
+                f.truncate()
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def read_from(self, offset=0):
+        """Yield (record, end_offset) for each complete record after `offset`."""
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                yield json.loads(line), offset
+
+    def reset(self):
+        """Swap in an empty journal under a new inode, so readers notice the reset."""
+        atomic_write(self.path, lambda tmp: open(tmp, "wb").close())
+
+
+def atomic_write(path, write):
+    """Call write(tmp_path), fsync the result, then rename it over `path`."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp)
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,42 @@
+import threading
+from contextlib import contextmanager
+
+from utils.metrics import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process exclusion is available
+    fcntl = None
+
+
+class ProcessLock:
+    """Re-entrant lock held across threads *and* processes sharing `path`.
+
+    Threads are serialized by an RLock; processes (e.g. uvicorn workers)
+    by an exclusive flock on `path`, taken only by the outermost holder.
+    `local` is the in-process half on its own, for readers that only need
+    a consistent view of this process's memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    @contextmanager
+    def hold(self):
+        with self.local:
+            if self._depth == 0 and fcntl is not None:
+                self._file = open(self.path, "a")
+                with metrics.timer("lock_wait_seconds"):
+                    fcntl.flock(self._file, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0 and self._file is not None:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+                    self._file.close()
+                    self._file = None
@@ -0,0 +1,81 @@
+import threading
+
+import orjson
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+
+def message_dict(msg):
+    """The wire form of a message in API responses."""
+    if not isinstance(msg, (HumanMessage, AIMessage, SystemMessage, ToolMessage)):
+        return {"type": "unknown", "content": str(msg)}
+    return {
+        "id": msg.id,
+        "type": msg.type,
+        "content": msg.content,
+        "tool_calls": [dict(tc) for tc in msg.tool_calls] if getattr(msg, "tool_calls", None) else None,
+        "name": getattr(msg, "name", None),
+        "tool_call_id": getattr(msg, "tool_call_id", None),
+    }
+
+
+def encode_message(msg):
+    return orjson.dumps(message_dict(msg), default=str)
+
+
+class MessageLog:
+    """Each thread's messages, JSON-encoded once, in conversation order.
+
+    The checkpointer appends the new tail of `messages` whenever it saves a
+    checkpoint, so serving "everything after message N" reads N..end as
+    ready-made JSON instead of re-serializing the whole history. `seq` is the
+    message's position in the thread; it doubles as the client's cursor. If
+    the stored tail no longer matches the state (a rewound or edited thread),
+    the thread's log is rebuilt.
+    """
+
+    def __init__(self, conn, lock=None):
+        self.conn = conn
+        self._lock = lock or threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS message_log (
+                       thread_id TEXT NOT NULL, seq INTEGER NOT NULL, message_id TEXT, body BLOB NOT NULL,
+                       PRIMARY KEY (thread_id, seq))""")
+
+    def append(self, thread_id, messages):
+        """Log the messages past the thread's last logged one; returns the thread's message count."""
+        with self._lock, self.conn:
+            last = self.conn.execute(
+                "SELECT seq, message_id FROM message_log WHERE thread_id = ? ORDER BY seq DESC LIMIT 1",
+                (thread_id,)).fetchone()
+            known = last[0] + 1 if last else 0
+            if known > len(messages) or (known and messages[known - 1].id != last[1]):
+                self.conn.execute("DELETE FROM message_log WHERE thread_id = ?", (thread_id,))
+                known = 0
+            self.conn.executemany(
+                "INSERT INTO message_log (thread_id, seq, message_id, body) VALUES (?, ?, ?, ?)",
+                [(thread_id, seq, msg.id, encode_message(msg))
+                 for seq, msg in enumerate(messages[known:], start=known)])
+        return len(messages)
+
+    def since(self, thread_id, cursor=0):
+        """(message count, encoded messages from position `cursor` on).
+
+        A cursor past the end (e.g. the thread expired) returns the whole log."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT seq, body FROM message_log WHERE thread_id = ? AND seq >= ? ORDER BY seq",
+                (thread_id, cursor)).fetchall()
+            if not rows and cursor:
+                count = self.conn.execute(
+                    "SELECT COUNT(*) FROM message_log WHERE thread_id = ?", (thread_id,)).fetchone()[0]
+                if count < cursor:
+                    rows = self.conn.execute(
+                        "SELECT seq, body FROM message_log WHERE thread_id = ? ORDER BY seq", (thread_id,)).fetchall()
+                return count, [body for _, body in rows]
+        return (rows[-1][0] + 1 if rows else cursor), [body for _, body in rows]
+
+    def delete(self, thread_id):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM message_log WHERE thread_id = ?", (thread_id,))
@@ -0,0 +1,105 @@
+import difflib
+import json
+import threading
+
+from utils.config import AVAILABILITY_PATH, CLINIC_REGISTRY_PATH
+
+
+class UnknownClinicError(KeyError):
+    pass
+
+
+class ClinicRegistry:
+    """Clinics served by this deployment, and the doctors and specializations of each.
+
+    Loaded from a JSON file:
+
+        {"default": "main",
+         "clinics": {"main": {"name": "...", "calendar": "Data/availability.csv",
+                              "doctors": ["john doe", ...], "specializations": ["general_dentist", ...]}}}
+
+    Every clinic's calendar is a separate slot store shard (its own snapshot,
+    journal and file lock), so lookups and bookings of one clinic never touch
+    or wait on another's. A clinic without "calendar" uses AVAILABILITY_PATH;
+    one without "doctors" / "specializations" accepts whatever its calendar holds.
+    """
+
+    def __init__(self, clinics, default=None):
+        if not clinics:
+            raise ValueError("The clinic registry needs at least one clinic")
+        self.clinics = clinics
+        self.default = default or next(iter(clinics))
+        if self.default not in clinics:
+            raise ValueError(f"Default clinic {self.default!r} is not in the registry")
+
+    @classmethod
+    def load(cls, path=CLINIC_REGISTRY_PATH):
+        """The registry at `path`; without one, a single clinic on AVAILABILITY_PATH."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls({"default": {"name": "Clinic"}})
+        return cls(data["clinics"], data.get("default"))
+
+    def resolve(self, clinic_id=None):
+        """`clinic_id`, or the default clinic for None; raises UnknownClinicError."""
+        clinic_id = clinic_id or self.default
+        if clinic_id not in self.clinics:
+            raise UnknownClinicError(clinic_id)
+        return clinic_id
+
+    def clinic(self, clinic_id=None):
+        return self.clinics[self.resolve(clinic_id)]
+
+    def calendar(self, clinic_id=None):
+        return self.clinic(clinic_id).get("calendar") or AVAILABILITY_PATH
+
+    def name(self, clinic_id=None):
+        return self.clinic(clinic_id).get("name") or self.resolve(clinic_id)
+
+    def _all(self, key):
+        """Union of `key` over every clinic, in registry order, or None if any clinic leaves it open."""
+        values = {}
+        for clinic in self.clinics.values():
+            if clinic.get(key) is None:
+                return None
+            values.update(dict.fromkeys(clinic[key]))
+        return list(values)
+
+    def doctors(self):
+        return self._all("doctors")
+
+    def specializations(self):
+        return self._all("specializations")
+
+    def summary(self):
+        return [{"id": clinic_id, "name": self.name(clinic_id), "default": clinic_id == self.default,
+                 "doctors": len(clinic["doctors"]) if clinic.get("doctors") is not None else None,
+                 "specializations": clinic.get("specializations")}
+                for clinic_id, clinic in self.clinics.items()]
+
+
+def suggest(name, known):
+    """A 'did you mean' hint for a name that isn't in `known`."""
+    close = difflib.get_close_matches(name, known, n=3, cutoff=0.6)
+    return f" Did you mean: {', '.join(close)}?" if close else ""
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ClinicRegistry.load()
+    return _registry
+
+
+def set_registry(registry):
+    """Install `registry` as the process-wide registry (benchmarks, tests of other deployments)."""
+    global _registry
+    with _registry_lock:
+        _registry = registry
@@ -0,0 +1,532 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from storage.journal import Journal, atomic_write
+from storage.snapshot import file_digest, file_signature, map_snapshot, read_header, write_snapshot
+from storage.locking import ProcessLock
+from storage.registry import get_registry
+from utils.config import AVAILABILITY_PATH, COMPACT_EVERY
+from utils.metrics import metrics
+
+DATE_FORMAT = "%d-%m-%Y"
+DATETIME_FORMAT = "%d-%m-%Y %H:%M"
+MINUTES_PER_DAY = 24 * 60
+NO_PATIENT = 0
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_minute(dt) -> int:
+    """Naive datetime -> minutes since the epoch, the store's time axis; a minute
+    already computed (e.g. DateTimeModel.minute) is returned as is."""
+    if isinstance(dt, (int, np.integer)):
+        return int(dt)
+    return int((dt - _EPOCH) // timedelta(minutes=1))
+
+
+def from_minute(minute: int) -> datetime:
+    return _EPOCH + timedelta(minutes=int(minute))
+
+
+def _am_pm(minute_of_day):
+    hours, minutes = divmod(minute_of_day, 60)
+    return f"{hours % 12 or 12}:{minutes:02d} {'AM' if hours < 12 else 'PM'}"
+
+
+# display label for every minute of the day, indexed with `minute % MINUTES_PER_DAY`
+TIME_LABELS = np.array([_am_pm(m) for m in range(MINUTES_PER_DAY)], dtype=object)
+
+
+def day_start(date) -> int:
+    """'DD-MM-YYYY' (or an epoch minute already parsed, e.g. DateModel.minute) -> epoch minute of that day's midnight."""
+    if isinstance(date, (int, np.integer)):
+        return int(date)
+    return to_minute(datetime.strptime(date, DATE_FORMAT))
+
+
+def _source(recorded):
+    """A snapshot's CSV source record; snapshots from before content digests recorded only the stat."""
+    if isinstance(recorded, list):
+        return {"stat": recorded, "sha256": None}
+    return recorded
+
+
+class SlotError(Exception):
+    pass
+
+
+class SlotUnavailableError(SlotError):
+    pass
+
+
+class AppointmentNotFoundError(SlotError):
+    pass
+
+
+class SlotStore:
+    """Process-resident, indexed view of the availability calendar.
+
+    Rows are kept sorted by (doctor, slot time) so a doctor's block is a
+    contiguous range and every lookup is a binary search inside it rather
+    than a boolean mask over the whole table.
+
+    The CSV at `path` is only imported: it is parsed once into a binary
+    snapshot at `<path>.slots` (see storage.snapshot), which every process
+    memory-maps instead of parsing. Replacing the CSV with different content
+    re-imports it and starts an empty journal, discarding changes made to the
+    old calendar; a CSV that was only touched (checkout, editor save) is
+    recognized by its content digest and keeps them. Every
+    booking, cancellation and reschedule is appended to `<path>.journal` and
+    replayed on load, and the journal is folded into a new snapshot every
+    `compact_every` records. `export_csv` writes the current calendar back out.
+
+    Mutations are compare-and-set under a lock shared by every thread and
+    process using the same calendar: the journal is caught up first, the
+    slot is re-checked, and only then is the record appended, so two
+    workers can never both book the same slot.
+    """
+
+    def __init__(self, path=AVAILABILITY_PATH, compact_every=COMPACT_EVERY, max_cached_results=10000):
+        self.path = path
+        self.snapshot_path = path + ".slots"
+        self.compact_every = compact_every
+        self.max_cached_results = max_cached_results
+        self._results = OrderedDict()
+        self.journal = Journal(path + ".journal")
+        self.version = 0
+        self._lock = ProcessLock(path + ".lock")
+        self._stat = None
+        self._source = None
+        self._confirmed = None # (digest, CSV stat) last seen to hold the imported content
+        self._journal_ino = None
+        self._journal_offset = 0
+        self._pending = 0
+        self._patients = None
+        self.reload()
+
+    # ---- loading / invalidation ----
+
+    def _unchanged(self, source, stat):
+        """Whether a CSV with `stat` is known to hold what `source` was imported from, without reading it."""
+        return (stat is None or source is None or stat == source["stat"]
+                or self._confirmed == (source["sha256"], stat))
+
+    def reload(self):
+        """Map the binary snapshot and replay the journal over it, importing the CSV
+        first if there is no snapshot yet or the CSV's content changed since the last import."""
+        with self._lock.hold(), metrics.timer("storage_seconds", op="reload"):
+            stat = file_signature(self.path)
+            stat = list(stat) if stat else None
+            header = read_header(self.snapshot_path)
+            source = _source(header[0]["source"]) if header else None
+            if header is None or not self._unchanged(source, stat):
+                digest = file_digest(self.path)
+                if header is None or digest != source["sha256"]:
+                    self._import_csv({"stat": stat, "sha256": digest})
+                self._confirmed = (digest, stat)
+            self._load_snapshot()
+            self._patients = None
+            self._results.clear()
+            self._journal_ino, _ = self.journal.signature()
+            self._journal_offset = 0
+            self._pending = 0
+            self._replay()
+            self.version += 1
+
+    def _import_csv(self, source):
+        import pandas as pd  # only importing a CSV needs it; keeps it out of import time
+        from tools.base_models import ColumnValidationError, DateTimeModel, IdentificationNumberModel
+
+        with metrics.timer("storage_seconds", op="import_csv"):
+            df = pd.read_csv(self.path, usecols=["date_slot", "specialization", "doctor_name",
+                                                  "is_available", "patient_to_attend"])
+            # whole columns are validated at once, with the same rules the tools apply to one value
+            minutes = DateTimeModel.minutes(df["date_slot"], name="date_slot")
+            patients = IdentificationNumberModel.ids(df["patient_to_attend"], missing=NO_PATIENT)
+            if df["is_available"].dtype != bool:
+                raise ColumnValidationError("is_available", "True or False",
+                                            ~df["is_available"].isin([True, False]).to_numpy())
+            doctor_codes, doctors = pd.factorize(df["doctor_name"], sort=True)
+            spec_codes, specializations = pd.factorize(df["specialization"], sort=True)
+
+            order = np.lexsort((minutes, doctor_codes))
+            doctor_codes, spec_codes = doctor_codes[order], spec_codes[order]
+            pairs = np.unique(spec_codes.astype(np.int64) * len(doctors) + doctor_codes)
+            spec_doctors = {}
+            for spec_code, doctor_code in zip(*np.divmod(pairs, len(doctors))):
+                spec_doctors.setdefault(specializations[spec_code], []).append(doctors[doctor_code])
+            columns = {
+                "minute": minutes[order],
+                "doctor": doctor_codes,
+                "spec": spec_codes,
+                "available": df["is_available"].to_numpy(dtype=bool)[order],
+                "patient": patients[order],
+            }
+            # the journal's records were made against the previous calendar; dropping them
+            # before the new snapshot lands means a crash in between can't replay them onto it
+            self.journal.reset()
+            write_snapshot(self.snapshot_path, columns, doctors, specializations, spec_doctors, source)
+
+    def _load_snapshot(self):
+        header, columns = map_snapshot(self.snapshot_path)
+        self._stat = file_signature(self.snapshot_path)
+        self._source = _source(header["source"])
+        self.doctors = header["doctors"]
+        self.specializations = header["specializations"]
+        self._spec_doctors = header["spec_doctors"]
+        self.minute = columns["minute"]
+        self.doctor = columns["doctor"]
+        self.spec = columns["spec"]
+        self.available = columns["available"]
+        self.patient = columns["patient"]
+        bounds = np.searchsorted(self.doctor, np.arange(len(self.doctors) + 1))
+        self._doctor_range = {name: (int(bounds[i]), int(bounds[i + 1]))
+                              for i, name in enumerate(self.doctors)}
+
+    def _replay(self):
+        for record, offset in self.journal.read_from(self._journal_offset):
+            for doctor_name, minute, available, patient_id in record["changes"]:
+                row = self._find_minute(doctor_name, minute)
+                if row is not None:
+                    self._set(row, available, patient_id)
+            self._journal_offset = offset
+            self._pending += 1
+
+    def refresh(self):
+        """Reload if the snapshot (or the CSV it was imported from) was replaced on disk,
+        or replay journal records appended since."""
+        with self._lock.local:
+            journal_ino, journal_size = self.journal.signature()
+            stat = file_signature(self.path)
+            if (file_signature(self.snapshot_path) != self._stat or journal_ino != self._journal_ino
+                    or journal_size < self._journal_offset
+                    or not self._unchanged(self._source, list(stat) if stat else None)):
+                self.reload()
+            elif journal_size > self._journal_offset:
+                with self._lock.hold(), metrics.timer("storage_seconds", op="replay"):
+                    self._replay()
+                    self.version += 1
+
+    @property
+    def state_token(self):
+        """Names the calendar state: equal in every process caught up to the same snapshot and journal offset."""
+        with self._lock.local:
+            return f"{self._stat}:{self._journal_ino}:{self._journal_offset}"
+
+    def invalidate(self):
+        with self._lock.local:
+            self._stat = None
+
+    # ---- lookups ----
+
+    def _day_range(self, doctor_name, day):
+        start, stop = self._doctor_range.get(doctor_name, (0, 0))
+        block = self.minute[start:stop]
+        lo, hi = np.searchsorted(block, [day, day + MINUTES_PER_DAY])
+        return start + int(lo), start + int(hi)
+
+    def find_slot(self, doctor_name, dt):
+        """Row index of the doctor's slot at exactly `dt` (a datetime or epoch minute), or None."""
+        with self._lock.local:
+            return self._find_minute(doctor_name, to_minute(dt))
+
+    def _find_minute(self, doctor_name, minute):
+        start, stop = self._doctor_range.get(doctor_name, (0, 0))
+        i = start + int(np.searchsorted(self.minute[start:stop], minute))
+        if i < stop and self.minute[i] == minute:
+            return i
+        return None
+
+    def _cached(self, key, compute):
+        with self._lock.local:
+            if key in self._results:
+                metrics.inc("result_cache", result="hit", kind=key[0])
+                self._results.move_to_end(key)
+                return self._results[key]
+            metrics.inc("result_cache", result="miss", kind=key[0])
+            result = self._results[key] = compute()
+            if len(self._results) > self.max_cached_results:
+                self._results.popitem(last=False)
+            return result
+
+    def _free_labels(self, doctor_name, day, spec_code=None):
+        lo, hi = self._day_range(doctor_name, day)
+        mask = self.available[lo:hi]
+        if spec_code is not None:
+            mask = mask & (self.spec[lo:hi] == spec_code)
+        return tuple(TIME_LABELS[self.minute[lo:hi][mask] % MINUTES_PER_DAY])
+
+    def free_slots(self, doctor_name, date):
+        """('8:30 AM', ...) free for the doctor that day; memoized until a slot of that doctor-day changes."""
+        day = day_start(date)
+        return self._cached(("doctor", doctor_name, day), lambda: self._free_labels(doctor_name, day))
+
+    def free_slots_by_specialization(self, specialization, date):
+        """((doctor_name, labels), ...) for doctors of that specialization with free slots that day."""
+        day = day_start(date)
+
+        def compute():
+            if specialization not in self._spec_doctors:
+                return ()
+            spec_code = self.specializations.index(specialization)
+            rows = ((doctor_name, self._free_labels(doctor_name, day, spec_code))
+                    for doctor_name in self._spec_doctors[specialization])
+            return tuple((doctor_name, labels) for doctor_name, labels in rows if labels)
+
+        return self._cached(("specialization", specialization, day), compute)
+
+    def next_free(self, doctor_names, after, within_days=7, k=3, specialization=None):
+        """The k earliest free slots at or after `after` (a datetime or epoch minute; and before `after + within_days`)
+        across `doctor_names`, as [(datetime, doctor_name, label)].
+
+        Each doctor's block is sorted by time, so the window is two binary
+        searches and only the free rows inside it are touched.
+        """
+        start_minute = to_minute(after)
+        end_minute = start_minute + within_days * MINUTES_PER_DAY
+        found = []
+        with self._lock.local:
+            spec_code = self.specializations.index(specialization) if specialization in self.specializations else None
+            for doctor_name in doctor_names:
+                start, stop = self._doctor_range.get(doctor_name, (0, 0))
+                lo, hi = np.searchsorted(self.minute[start:stop], [start_minute, end_minute])
+                lo, hi = start + int(lo), start + int(hi)
+                mask = self.available[lo:hi]
+                if spec_code is not None:
+                    mask = mask & (self.spec[lo:hi] == spec_code)
+                minutes = self.minute[lo:hi][mask][:k]
+                found.extend((int(m), doctor_name) for m in minutes)
+        found.sort()
+        return [(from_minute(m), doctor_name, TIME_LABELS[m % MINUTES_PER_DAY]) for m, doctor_name in found[:k]]
+
+    def doctors_for(self, specialization):
+        with self._lock.local:
+            return list(self._spec_doctors.get(specialization, []))
+
+    def _patient_index(self):
+        if self._patients is None:
+            index = {}
+            for row in np.flatnonzero(self.patient != NO_PATIENT).tolist():
+                index.setdefault(int(self.patient[row]), set()).add(row)
+            self._patients = index
+        return self._patients
+
+    def appointments_for(self, patient_id):
+        """[(doctor_name, datetime)] booked for a patient, in time order."""
+        with self._lock.local:
+            rows = self._patient_index().get(int(patient_id), ())
+            booked = [(int(self.minute[r]), self.doctors[self.doctor[r]]) for r in rows]
+        return [(doctor, from_minute(m)) for m, doctor in sorted(booked)]
+
+    # ---- mutations ----
+
+    def _set(self, row, available, patient_id):
+        day = int(self.minute[row]) // MINUTES_PER_DAY * MINUTES_PER_DAY
+        self._results.pop(("doctor", self.doctors[self.doctor[row]], day), None)
+        self._results.pop(("specialization", self.specializations[self.spec[row]], day), None)
+        if self._patients is not None:
+            old = int(self.patient[row])
+            if old != NO_PATIENT:
+                self._patients.get(old, set()).discard(row)
+            if patient_id != NO_PATIENT:
+                self._patients.setdefault(patient_id, set()).add(row)
+        self.available[row] = available
+        self.patient[row] = patient_id
+
+    def _commit(self, op, changes):
+        """Journal `changes` ([(row, available, patient_id)]) as one record, then apply them.
+
+        Callers hold the process lock and have re-checked the rows after refresh().
+        """
+        record = {"op": op, "changes": [[self.doctors[self.doctor[row]], int(self.minute[row]), available, patient_id]
+                                        for row, available, patient_id in changes]}
+        with metrics.timer("storage_seconds", op="journal_append"):
+            self._journal_offset = self.journal.append(record, self._journal_offset)
+        for row, available, patient_id in changes:
+            self._set(row, available, patient_id)
+        self._pending += 1
+        self.version += 1
+        if self._pending >= self.compact_every:
+            self.compact()
+
+    def _plan(self, op, staged):
+        """[(row, available, patient_id)] that `op` would write, checked against the
+        current rows overlaid with `staged` ({row: (available, patient_id)}).
+
+        Operations are ("book", doctor, dt, patient_id), ("cancel", doctor, dt,
+        patient_id) and ("reschedule", doctor, old_dt, new_dt, patient_id); a
+        dt is a datetime or an epoch minute.
+        Raises SlotUnavailableError / AppointmentNotFoundError.
+        """
+        def state(row):
+            return staged.get(row, (bool(self.available[row]), int(self.patient[row])))
+
+        def free_row(doctor_name, dt):
+            minute = to_minute(dt)
+            row = self._find_minute(doctor_name, minute)
+            if row is None or not state(row)[0]:
+                raise SlotUnavailableError(f"{doctor_name} is not available at {from_minute(minute):{DATETIME_FORMAT}}")
+            return row
+
+        def booked_row(doctor_name, dt, patient_id):
+            minute = to_minute(dt)
+            row = self._find_minute(doctor_name, minute)
+            if row is None or state(row)[1] != patient_id:
+                raise AppointmentNotFoundError(f"No appointment for {patient_id} with {doctor_name} "
+                                               f"at {from_minute(minute):{DATETIME_FORMAT}}")
+            return row
+
+        kind, doctor_name, *args = op
+        patient_id = int(args[-1])
+        if kind == "book":
+            return [(free_row(doctor_name, args[0]), False, patient_id)]
+        if kind == "cancel":
+            return [(booked_row(doctor_name, args[0], patient_id), True, NO_PATIENT)]
+        if kind == "reschedule":
+            new_row = free_row(doctor_name, args[1])
+            old_row = booked_row(doctor_name, args[0], patient_id)
+            return [(old_row, True, NO_PATIENT), (new_row, False, patient_id)]
+        raise ValueError(f"Unknown operation {kind!r}")
+
+    def _apply(self, op):
+        with self._lock.hold():
+            self.refresh()
+            self._commit(op[0], self._plan(op, {}))
+
+    def book(self, doctor_name, dt, patient_id):
+        self._apply(("book", doctor_name, dt, patient_id))
+
+    def cancel(self, doctor_name, dt, patient_id):
+        self._apply(("cancel", doctor_name, dt, patient_id))
+
+    def reschedule(self, doctor_name, old_dt, new_dt, patient_id):
+        """Free the old slot and book the new one as a single journal record."""
+        self._apply(("reschedule", doctor_name, old_dt, new_dt, patient_id))
+
+    def apply_batch(self, ops, atomic=True):
+        """Plan every operation in order against the effects of the ones before it,
+        then commit all successful changes as one journal record (one fsync).
+
+        Returns one error (SlotError) or None per operation. With `atomic`, a
+        single failure commits nothing.
+        """
+        with self._lock.hold():
+            self.refresh()
+            staged, changes, errors = {}, [], []
+            for op in ops:
+                try:
+                    planned = self._plan(op, staged)
+                except SlotError as e:
+                    errors.append(e)
+                    continue
+                staged.update((row, (available, patient_id)) for row, available, patient_id in planned)
+                changes.extend(planned)
+                errors.append(None)
+            if changes and not (atomic and any(errors)):
+                self._commit("batch", changes)
+            return errors
+
+    # ---- persistence ----
+
+    def to_frame(self):
+        """The calendar in the CSV schema (the columns the importer reads)."""
+        import pandas as pd
+
+        return pd.DataFrame({
+            "date_slot": pd.to_datetime(self.minute.astype("datetime64[m]")).strftime(DATETIME_FORMAT),
+            "specialization": np.asarray(self.specializations, dtype=object)[self.spec],
+            "doctor_name": np.asarray(self.doctors, dtype=object)[self.doctor],
+            "is_available": self.available,
+            "patient_to_attend": pd.array(np.where(self.patient == NO_PATIENT, None, self.patient), dtype="Int64"),
+        })
+
+    def export_csv(self, path):
+        """Write the current calendar as CSV. Writing it over `self.path` re-imports it everywhere."""
+        with self._lock.hold():
+            self.refresh()
+            frame = self.to_frame()
+        atomic_write(path, lambda tmp: frame.to_csv(tmp, index=False))
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot, map it, and start an empty journal."""
+        with self._lock.hold(), metrics.timer("storage_seconds", op="compact"):
+            columns = {"minute": self.minute, "doctor": self.doctor, "spec": self.spec,
+                       "available": self.available, "patient": self.patient}
+            write_snapshot(self.snapshot_path, columns, self.doctors, self.specializations,
+                           self._spec_doctors, self._source)
+            self.journal.reset()
+            # the new mapping is shared again; rows are unchanged, so the patient index and cached results stay valid
+            self._load_snapshot()
+            self._journal_ino, _ = self.journal.signature()
+            self._journal_offset = 0
+            self._pending = 0
+
+
+# one store per clinic: each clinic's calendar is its own shard, with its own file lock
+_stores = {}
+_store_lock = threading.Lock()
+_clinic = ContextVar("clinic", default=None)
+_pinned = ContextVar("pinned_store", default=None)
+
+
+def get_store(clinic=None) -> SlotStore:
+    """The store of `clinic` (default: the current clinic, see use_clinic), refreshed
+    if its calendar changed on disk. Raises UnknownClinicError."""
+    clinic = get_registry().resolve(clinic or _clinic.get())
+    pinned = _pinned.get()
+    if pinned is not None and pinned[0] == clinic:
+        return pinned[1]
+    store = _stores.get(clinic)
+    if store is None:
+        with _store_lock:
+            store = _stores.get(clinic)
+            if store is None:
+                store = _stores[clinic] = SlotStore(get_registry().calendar(clinic))
+                return store
+    store.refresh()
+    return store
+
+
+def current_clinic():
+    """The clinic get_store() uses without arguments."""
+    return get_registry().resolve(_clinic.get())
+
+
+@contextmanager
+def use_clinic(clinic):
+    """Make get_store() without arguments use `clinic` for the rest of the block
+    (None keeps the default clinic). Like the pin, it follows the context into
+    copied-context threads and asyncio tasks."""
+    token = _clinic.set(clinic)
+    try:
+        yield
+    finally:
+        _clinic.reset(token)
+
+
+@contextmanager
+def pinned_store(store=None):
+    """Refresh the current clinic's store once (or take `store` as already refreshed),
+    then have get_store() skip the on-disk check for the rest of the block.
+
+    The pin is a context variable, so it covers work started from the block
+    (threads submitted with a copied context, asyncio tasks) and nothing else.
+    Mutations still catch up with other processes under the file lock.
+    """
+    clinic = current_clinic()
+    token = _pinned.set((clinic, store or get_store(clinic)))
+    try:
+        yield _pinned.get()[1]
+    finally:
+        _pinned.reset(token)
+
+
+def set_store(store, clinic=None):
+    """Install `store` as the store of `clinic` (default clinic for None): benchmarks, alternative calendars."""
+    with _store_lock:
+        _stores[get_registry().resolve(clinic)] = store
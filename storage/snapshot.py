@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from storage.journal import atomic_write
+
+MAGIC = b"SLOTSv1\n"
+ALIGN = 64
+
+# name -> on-disk dtype; `available` is stored as a bitset (np.packbits)
+COLUMNS = {"minute": "<i8", "doctor": "<i4", "spec": "<i2", "patient": "<i4", "available": "|u1"}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def write_snapshot(path, columns, doctors, specializations, spec_doctors, source=None):
+    """Atomically write the sorted slot columns and their dictionaries to `path`.
+
+    Layout: MAGIC, a little-endian u64 header length, a JSON header, then each
+    column as raw little-endian values at a 64-byte aligned offset (relative
+    to the end of the aligned header), so every column can be mapped in place.
+    `source` ({"stat": [...], "sha256": ...}) identifies the CSV the rows were imported from.
+    """
+    patient = np.asarray(columns["patient"])
+    if patient.size and (patient.min() < 0 or patient.max() > np.iinfo(np.int32).max):
+        raise SnapshotError("patient ids must fit the int32 patient column")
+    arrays = {name: np.packbits(columns[name]) if name == "available"
+              else np.ascontiguousarray(columns[name], dtype=dtype)
+              for name, dtype in COLUMNS.items()}
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": COLUMNS[name], "offset": offset, "nbytes": int(array.nbytes)}
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({"rows": int(len(columns["minute"])), "doctors": list(doctors),
+                         "specializations": list(specializations), "spec_doctors": spec_doctors,
+                         "source": source, "columns": layout}).encode()
+
+    def write(tmp):
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+            f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+            start = f.tell()
+            for name, array in arrays.items():
+                f.seek(start + layout[name]["offset"])
+                array.tofile(f)
+
+    atomic_write(path, write)
+
+
+def read_header(path):
+    """(header dict, data start offset), or None if there is no snapshot at `path`."""
+    try:
+        with open(path, "rb") as f:
+            magic, length = f.read(len(MAGIC)), f.read(8)
+            if magic != MAGIC or len(length) != 8:
+                raise SnapshotError(f"{path} is not a slot snapshot")
+            (length,) = struct.unpack("<Q", length)
+            return json.loads(f.read(length)), _aligned(len(MAGIC) + 8 + length)
+    except FileNotFoundError:
+        return None
+
+
+def map_snapshot(path):
+    """Header and columns of the snapshot, the fixed-width ones memory-mapped copy-on-write.
+
+    Pages are shared by every process mapping the same file until one of them
+    writes to a slot; `available` is unpacked from its bitset into a bool array.
+    """
+    header, start = read_header(path)
+    rows = header["rows"]
+    columns = {}
+    for name, spec in header["columns"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = spec["nbytes"] // dtype.itemsize
+        if count == 0:
+            columns[name] = np.empty(0, dtype=dtype)
+        else:
+            columns[name] = np.memmap(path, dtype=dtype, mode="c", offset=start + spec["offset"], shape=(count,))
+    columns["available"] = np.unpackbits(columns["available"], count=rows).astype(bool)
+    return header, columns
+
+
+def file_signature(path):
+    """(inode, size, mtime_ns) of `path`, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def file_digest(path):
+    """sha256 hex digest of the file's content, or None if it doesn't exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
@@ -1,30 +1,147 @@
 from typing_extensions import Annotated,List,Optional
 from pydantic import Field,field_validator,BaseModel
-from datetime import datetime,date,timedelta
-import re 
+from datetime import datetime
+from functools import cached_property, lru_cache
+import re
+
+import numpy as np
+
+from storage.slot_store import to_minute
+
+_DATETIME = re.compile(r"(\d{2})-(\d{2})-(\d{4}) (\d{2}):(\d{2})")
+_DATE = re.compile(r"(\d{2})-(\d{2})-(\d{4})")
+
+# 7 or 8 digits
+MIN_ID, MAX_ID = 1_000_000, 99_999_999
+
+
+@lru_cache(maxsize=4096)
+def parse_datetime(value: str) -> datetime:
+    """'DD-MM-YYYY HH:MM' -> datetime, parsed once per distinct string."""
+    match = _DATETIME.fullmatch(value)
+    if not match:
+        raise ValueError("Expected format: 'DD-MM-YYYY HH:MM'")
+    day, month, year, hour, minute = map(int, match.groups())
+    return datetime(year, month, day, hour, minute) # raises for 31-02, 24:00, ...
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> datetime:
+    """'DD-MM-YYYY' -> midnight of that day."""
+    match = _DATE.fullmatch(value)
+    if not match:
+        raise ValueError("Expected format: 'DD-MM-YYYY'")
+    day, month, year = map(int, match.groups())
+    return datetime(year, month, day)
+
+
+class ColumnValidationError(ValueError):
+    """Invalid values in a column validated in bulk; `rows` are the first offending data rows (0-based)."""
+
+    def __init__(self, column, expected, bad):
+        rows = np.flatnonzero(bad)
+        self.column, self.rows = column, rows[:10].tolist()
+        super().__init__(f"{column}: {rows.size} invalid value(s), expected {expected}; "
+                         f"first at data rows {', '.join(map(str, self.rows))}")
+
+
+def _digits(chars, start, width):
+    """The integer in character columns start..start+width of a (rows, width) uint8 matrix."""
+    value = np.zeros(len(chars), dtype=np.int64)
+    for i in range(start, start + width):
+        value = value * 10 + (chars[:, i].astype(np.int64) - ord("0"))
+    return value
+
+
+def _float_or_invalid(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return -1.0 # out of the ID range, reported as invalid
+
 
 class DateTimeModel(BaseModel):
     date: str = Field(description="Date and time as 'DD-MM-YYYY HH:MM'")
     @field_validator("date")
     def check_format_date(cls, v):
-        if not re.match(r'^\d{2}-\d{2}-\d{4} \d{2}:\d{2}$', v):
-            raise ValueError("Expected format: 'DD-MM-YYYY HH:MM'")
-        datetime.strptime(v, "%d-%m-%Y %H:%M")
+        parse_datetime(v)
         return v
 
+    @cached_property
+    def dt(self) -> datetime:
+        return parse_datetime(self.date)
+
+    @cached_property
+    def minute(self) -> int:
+        """Epoch minute, the slot store's time axis."""
+        return to_minute(self.dt)
+
+    @classmethod
+    def minutes(cls, column, name="date_slot"):
+        """Validate a whole column of 'DD-MM-YYYY HH:MM' strings with array operations;
+        returns their epoch minutes (int64). Raises ColumnValidationError.
+
+        Every value is viewed as 17 bytes: digits, separators and the
+        terminating NUL are checked column by column, the fields are read
+        as integers, and impossible dates are caught by round-tripping the
+        day through datetime64.
+        """
+        values = np.asarray(column, dtype=object)
+        try:
+            chars = values.astype("S17").view(np.uint8).reshape(len(values), 17)
+        except (UnicodeEncodeError, ValueError):
+            chars = np.array([str(v).encode("ascii", "replace")[:17].ljust(17, b"\0") for v in values],
+                             dtype="S17").view(np.uint8).reshape(len(values), 17)
+        digit = (chars >= ord("0")) & (chars <= ord("9"))
+        ok = digit[:, [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15]].all(axis=1)
+        ok &= (chars[:, 2] == ord("-")) & (chars[:, 5] == ord("-")) & (chars[:, 10] == ord(" "))
+        ok &= (chars[:, 13] == ord(":")) & (chars[:, 16] == 0)
+        day, month, year = _digits(chars, 0, 2), _digits(chars, 3, 2), _digits(chars, 6, 4)
+        hour, minute = _digits(chars, 11, 2), _digits(chars, 14, 2)
+        ok &= (month >= 1) & (month <= 12) & (day >= 1) & (hour < 24) & (minute < 60)
+        months = np.where(ok, (year - 1970) * 12 + month - 1, 0).astype("datetime64[M]")
+        days = months.astype("datetime64[D]") + np.where(ok, day - 1, 0)
+        ok &= days.astype("datetime64[M]") == months # day 31 of a 30-day month rolls over
+        if not ok.all():
+            raise ColumnValidationError(name, "'DD-MM-YYYY HH:MM'", ~ok)
+        return days.astype(np.int64) * 24 * 60 + hour * 60 + minute
+
+
 class DateModel(BaseModel):
     date: str = Field(description="Date as 'DD-MM-YYYY'")
     @field_validator("date")
     def check_format_date(cls, v):
-        if not re.match(r'^\d{2}-\d{2}-\d{4}$', v):
-            raise ValueError("Expected format: 'DD-MM-YYYY'")
-        datetime.strptime(v, "%d-%m-%Y")
+        parse_date(v)
         return v
 
+    @cached_property
+    def dt(self) -> datetime:
+        return parse_date(self.date)
+
+    @cached_property
+    def minute(self) -> int:
+        """Epoch minute of the day's midnight."""
+        return to_minute(self.dt)
+
+
 class IdentificationNumberModel(BaseModel):
     id: int = Field(description="7 or 8-digit ID")
     @field_validator("id")
     def check_format_id(cls, v):
-        if not re.match(r'^\d{7,8}$', str(v)):
+        if not MIN_ID <= v <= MAX_ID:
             raise ValueError("ID should be 7 or 8 digits")
-        return v
\ No newline at end of file
+        return v
+
+    @classmethod
+    def ids(cls, column, name="patient_to_attend", missing=0):
+        """Validate a column of optional IDs (NaN = none) at once; returns int64 with
+        `missing` for the empty cells. Raises ColumnValidationError."""
+        try:
+            values = np.asarray(column, dtype=np.float64)
+        except (TypeError, ValueError):
+            values = np.array([_float_or_invalid(v) for v in column], dtype=np.float64)
+        present = ~np.isnan(values)
+        bad = present & ((values != np.floor(values)) | (values < MIN_ID) | (values > MAX_ID))
+        if bad.any():
+            raise ColumnValidationError(name, "a 7 or 8-digit ID or nothing", bad)
+        return np.where(present, values, missing).astype(np.int64)
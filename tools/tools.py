@@ -1,94 +1,134 @@
 
-from datetime import datetime,date
-import pandas as pd 
 from langchain_core.tools import tool
-from typing_extensions import Literal,List
+from typing_extensions import Literal,Optional,Annotated
 from pydantic import Field
 from tools.base_models import DateTimeModel,DateModel,IdentificationNumberModel
+from storage.registry import get_registry,suggest
+from storage.slot_store import get_store,current_clinic,SlotUnavailableError,AppointmentNotFoundError
+from utils.config import TOOL_ENUM_LIMIT
 
-@tool
-def convert_to_am_pm(time_str):
-    """ convert_to_am_pm"""
-    hours, minutes = map(int, time_str.split(":"))
-    period = "AM" if hours < 12 else "PM"
-    hours = hours % 12 or 12
-    return f"{hours}:{minutes:02d} {period}"
+def registry_names(values, description):
+    """Schema type for names from the clinic registry: an enum while the list is short,
+    else a described string, so the tool schemas sent with every prompt don't grow with
+    the number of doctors. The tools check the name against the clinic either way."""
+    if values and len(values) <= TOOL_ENUM_LIMIT:
+        return Literal[tuple(values)]
+    return Annotated[str, Field(description=description)]
+
+DoctorName = registry_names(get_registry().doctors(),
+                            "Doctor's full name in lowercase, e.g. 'john doe'. Look names up with list_doctors.")
 
+Specialization = registry_names(get_registry().specializations(),
+                                "Specialization in snake_case, e.g. 'general_dentist'.")
 
-def load_availability():
-    df = pd.read_csv("Data/availability.csv")
-    df['date_slot_dt'] = pd.to_datetime(df['date_slot'], format="%d-%m-%Y %H:%M")
-    df['date_only'] = df['date_slot_dt'].dt.strftime('%d-%m-%Y')
-    df['time_only'] = df['date_slot_dt'].dt.strftime('%H:%M')
-    return df
+def clinic_names(key, store):
+    """The current clinic's doctors or specializations: from the registry, else from its calendar."""
+    names = get_registry().clinic(current_clinic()).get(key)
+    if names is None:
+        names = store.doctors if key == "doctors" else store.specializations
+    return names
 
+def unknown_name(key, name, store):
+    """An error message if `name` isn't one of the current clinic's doctors / specializations, else None."""
+    known = clinic_names(key, store)
+    if name in known:
+        return None
+    kind = "doctor" if key == "doctors" else "specialization"
+    return f"Unknown {kind} {name!r} at {get_registry().name(current_clinic())}.{suggest(name, known)}"
+
+@tool
+def list_doctors(specialization: Optional[Specialization] = None) -> str:
+    """ list_doctors: the doctors of this clinic, optionally only those of one specialization"""
+    store = get_store()
+    if specialization is None:
+        return ", ".join(clinic_names("doctors", store))
+    error = unknown_name("specializations", specialization, store)
+    if error:
+        return error
+    return ", ".join(store.doctors_for(specialization)) or f"No {specialization} at this clinic."
 
 @tool
-def check_availability_by_doctor(desired_date: DateModel, doctor_name: Literal[
-    'kevin anderson', 'robert martinez', 'susan davis', 'daniel miller', 'sarah wilson',
-    'michael green', 'lisa brown', 'jane smith', 'emily johnson', 'john doe']) -> str:
+def check_availability_by_doctor(desired_date: DateModel, doctor_name: DoctorName) -> str:
     """ check_availability_by_doctor"""
-    df = load_availability()
-    rows = df[(df['date_only'] == desired_date.date) & (df['doctor_name'] == doctor_name) & (df['is_available']==True)]['time_only'].tolist()
+    store = get_store()
+    error = unknown_name("doctors", doctor_name, store)
+    if error:
+        return error
+    rows = store.free_slots(doctor_name, desired_date.minute)
     if not rows:
         return f"No availability for {doctor_name} on {desired_date.date}."
-    slots = ", ".join(convert_to_am_pm.invoke(t) for t in rows)
+    slots = ", ".join(rows)
     return f"Availability for {doctor_name} on {desired_date.date}: {slots}"
 
 @tool
-def check_availability_by_specialization(desired_date: DateModel, specialization: Literal[
-    "general_dentist", "cosmetic_dentist", "prosthodontist", "pediatric_dentist", "emergency_dentist", "oral_surgeon", "orthodontist"]) -> str:
+def check_availability_by_specialization(desired_date: DateModel, specialization: Specialization) -> str:
     """ check_availability_by_specialization"""
-    df = load_availability()
-    rows = df[(df['date_only'] == desired_date.date) & (df['specialization'] == specialization) & (df['is_available']==True)] \
-        .groupby(['specialization', 'doctor_name'])['time_only'].apply(list).reset_index()
-    if rows.empty:
+    store = get_store()
+    error = unknown_name("specializations", specialization, store)
+    if error:
+        return error
+    rows = store.free_slots_by_specialization(specialization, desired_date.minute)
+    if not rows:
         return f"No availability for {specialization} on {desired_date.date}."
-    return "\n".join([f"- {row['doctor_name']}: {', '.join(convert_to_am_pm.invoke(t) for t in row['time_only'])}" for _, row in rows.iterrows()])
+    return "\n".join([f"- {doctor}: {', '.join(labels)}" for doctor, labels in rows])
+
+@tool
+def find_next_available(after: DateTimeModel,
+                        doctor_name: Optional[DoctorName] = None,
+                        specialization: Optional[Specialization] = None,
+                        within_days: Annotated[int, Field(ge=1, le=60)] = 7,
+                        k: Annotated[int, Field(ge=1, le=20)] = 3) -> str:
+    """ find_next_available: the k earliest free slots at or after a date and time, for one doctor or a whole specialization"""
+    if (doctor_name is None) == (specialization is None):
+        return "Provide exactly one of doctor_name or specialization."
+    store = get_store()
+    error = (unknown_name("doctors", doctor_name, store) if doctor_name
+             else unknown_name("specializations", specialization, store))
+    if error:
+        return error
+    doctors = [doctor_name] if doctor_name else store.doctors_for(specialization)
+    slots = store.next_free(doctors, after.minute, within_days, k, specialization)
+    if not slots:
+        return f"No availability for {doctor_name or specialization} within {within_days} days of {after.date}."
+    return "\n".join(f"- {dt:%d-%m-%Y} {label} with {doctor}" for dt, doctor, label in slots)
 
 @tool
-def set_appointment(desired_date: DateTimeModel, id_number: IdentificationNumberModel, doctor_name: Literal[
-    'kevin anderson', 'robert martinez', 'susan davis', 'daniel miller', 'sarah wilson',
-    'michael green', 'lisa brown', 'jane smith', 'emily johnson', 'john doe']) -> str:
+def set_appointment(desired_date: DateTimeModel, id_number: IdentificationNumberModel, doctor_name: DoctorName) -> str:
     """ set_appointment"""
-    df = load_availability()
-    dt = datetime.strptime(desired_date.date, "%d-%m-%Y %H:%M")
-    match = df[(df['doctor_name'] == doctor_name) & (df['is_available']==True) & (df['date_slot_dt'] == dt)]
-    if match.empty:
+    store = get_store()
+    error = unknown_name("doctors", doctor_name, store)
+    if error:
+        return error
+    try:
+        store.book(doctor_name, desired_date.minute, id_number.id)
+    except SlotUnavailableError:
         return "No available appointments for that case."
-    df.loc[match.index[0], ['is_available', 'patient_to_attend']] = [False, id_number.id]
-    df.to_csv("Data/availability.csv", index=False)
     return "Successfully booked the appointment."
 
 @tool
-def cancel_appointment(date: DateTimeModel, id_number: IdentificationNumberModel, doctor_name: Literal[
-    'kevin anderson', 'robert martinez', 'susan davis', 'daniel miller', 'sarah wilson',
-    'michael green', 'lisa brown', 'jane smith', 'emily johnson', 'john doe']) -> str:
+def cancel_appointment(date: DateTimeModel, id_number: IdentificationNumberModel, doctor_name: DoctorName) -> str:
     """cancel_appointment """
-    df = load_availability()
-    dt = datetime.strptime(date.date, "%d-%m-%Y %H:%M")
-    idx = df[(df['date_slot_dt'] == dt) & (df['patient_to_attend'] == id_number.id) & (df['doctor_name'] == doctor_name)].index
-    if idx.empty:
+    store = get_store()
+    error = unknown_name("doctors", doctor_name, store)
+    if error:
+        return error
+    try:
+        store.cancel(doctor_name, date.minute, id_number.id)
+    except AppointmentNotFoundError:
         return "No matching appointment found."
-    df.loc[idx, ['is_available', 'patient_to_attend']] = [True, None]
-    df.to_csv("Data/availability.csv", index=False)
     return "Successfully cancelled."
 
 @tool
-def reschedule_appointment(old_date: DateTimeModel, new_date: DateTimeModel, id_number: IdentificationNumberModel, doctor_name: Literal[
-    'kevin anderson', 'robert martinez', 'susan davis', 'daniel miller', 'sarah wilson',
-    'michael green', 'lisa brown', 'jane smith', 'emily johnson', 'john doe']) -> str:
+def reschedule_appointment(old_date: DateTimeModel, new_date: DateTimeModel, id_number: IdentificationNumberModel, doctor_name: DoctorName) -> str:
     """ reschedule_appointment"""
-    df = load_availability()
-    old_dt = datetime.strptime(old_date.date, "%d-%m-%Y %H:%M")
-    new_dt = datetime.strptime(new_date.date, "%d-%m-%Y %H:%M")
-    new_slot = df[(df['date_slot_dt'] == new_dt) & (df['is_available']==True) & (df['doctor_name'] == doctor_name)]
-    if new_slot.empty:
+    store = get_store()
+    error = unknown_name("doctors", doctor_name, store)
+    if error:
+        return error
+    try:
+        store.reschedule(doctor_name, old_date.minute, new_date.minute, id_number.id)
+    except SlotUnavailableError:
         return "New time not available."
-    old_idx = df[(df['date_slot_dt'] == old_dt) & (df['patient_to_attend'] == id_number.id) & (df['doctor_name'] == doctor_name)].index
-    if old_idx.empty:
+    except AppointmentNotFoundError:
         return "Old appointment not found."
-    df.loc[old_idx, ['is_available', 'patient_to_attend']] = [True, None]
-    df.loc[new_slot.index[0], ['is_available', 'patient_to_attend']] = [False, id_number.id]
-    df.to_csv("Data/availability.csv", index=False)
     return "Rescheduled successfully."
\ No newline at end of file
@@ -11,7 +11,48 @@ LANGSMITH_PROJECT = os.getenv("LANGSMITH_PROJECT")
 LLM_MODEL = "openai/gpt-oss-120b"
 TEMPERATURE = 0.9
 
-BACKEND_URL = ""
+# LLM gateway: one pooled client per process, rate limits (0 = unlimited) and retries
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") # e.g. a local fake server for tests
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "20"))
+
+BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+
+AVAILABILITY_PATH = os.getenv("AVAILABILITY_PATH", "Data/availability.csv")
+COMPACT_EVERY = int(os.getenv("COMPACT_EVERY", "1000"))
+
+# clinics, their doctors and calendar shards (see storage.registry)
+CLINIC_REGISTRY_PATH = os.getenv("CLINIC_REGISTRY_PATH", "Data/clinics.json")
+# above this many names, tool schemas take a free-text doctor name (checked at call time) instead of an enum
+TOOL_ENUM_LIMIT = int(os.getenv("TOOL_ENUM_LIMIT", "50"))
+TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", "32"))
+
+CHECKPOINTER = os.getenv("CHECKPOINTER", "sqlite")
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "Data/checkpoints.sqlite")
+CHECKPOINT_MAX_PER_THREAD = int(os.getenv("CHECKPOINT_MAX_PER_THREAD", "20"))
+CHECKPOINT_TTL_SECONDS = int(os.getenv("CHECKPOINT_TTL_SECONDS", str(7 * 24 * 3600)))
+CHECKPOINT_SWEEP_EVERY = int(os.getenv("CHECKPOINT_SWEEP_EVERY", "500"))
+
+# protected tool calls waiting for review (see /approvals)
+APPROVALS_DB = os.getenv("APPROVALS_DB", "Data/approvals.sqlite")
+
+# conversation turns sent to the LLM verbatim; older turns are summarized (0 = send everything)
+CONTEXT_MAX_TURNS = int(os.getenv("CONTEXT_MAX_TURNS", "6"))
+
+FAST_PATH = os.getenv("FAST_PATH", "true").lower() in ("1", "true", "yes")
+
+LLM_CACHE = os.getenv("LLM_CACHE", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "Data/llm_cache.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+# cosine threshold for reusing answers to near-identical prompts (0 = exact matches only)
+LLM_CACHE_SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", "0"))
     
 
     
\ No newline at end of file
@@ -0,0 +1,142 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+# seconds; spans fast in-memory lookups (~1ms) up to slow LLM round-trips
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+class Metrics:
+    """Process-wide counters, gauges, value summaries (count / sum / max) and latency histograms, keyed by name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._gauges = defaultdict(float)
+        self._summaries = {}
+        self._histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self._counters[self._key(name, labels)] += value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def add(self, name, delta, **labels):
+        """Move a gauge up or down (e.g. a queue length)."""
+        with self._lock:
+            self._gauges[self._key(name, labels)] += delta
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            count, total, peak = self._summaries.get(key, (0, 0.0, value))
+            self._summaries[key] = (count + 1, total + value, max(peak, value))
+
+    def histogram(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = (buckets, [0] * (len(buckets) + 1), [0.0])
+            bounds, counts, total = self._histograms[key]
+            counts[bisect_left(bounds, value)] += 1
+            total[0] += value
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Record the duration of the block, in seconds, in histogram `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        """Plain-dict view of every metric with labels rendered as name{k=v}."""
+        def render(key):
+            name, labels = key
+            return f"{name}{{{','.join(f'{k}={v}' for k, v in labels)}}}" if labels else name
+
+        with self._lock:
+            return {
+                "counters": {render(k): v for k, v in self._counters.items()},
+                "gauges": {render(k): v for k, v in self._gauges.items()},
+                "summaries": {render(k): {"count": c, "sum": s, "max": m, "avg": s / c}
+                              for k, (c, s, m) in self._summaries.items()},
+                "histograms": {render(k): {"count": sum(counts), "sum": total[0],
+                                           "buckets": dict(zip([*map(str, bounds), "+Inf"], counts))}
+                               for k, (bounds, counts, total) in self._histograms.items()},
+            }
+
+    def render_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            summaries = sorted(self._summaries.items())
+            histograms = sorted((k, (b, list(c), t[0])) for k, (b, c, t) in self._histograms.items())
+
+        lines, typed = [], set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        hits = defaultdict(lambda: [0.0, 0.0])
+        for (name, labels), value in counters:
+            declare(f"{name}_total", "counter")
+            lines.append(f"{name}_total{_labels(labels)} {value}")
+            result = dict(labels).get("result")
+            if result in ("hit", "miss"):
+                hits[name][0] += value if result == "hit" else 0
+                hits[name][1] += value
+        for name, (hit, total) in sorted(hits.items()):
+            declare(f"{name}_hit_ratio", "gauge")
+            lines.append(f"{name}_hit_ratio {hit / total}")
+        for (name, labels), value in gauges:
+            declare(name, "gauge")
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), (count, total, _) in summaries:
+            declare(name, "summary")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+        for (name, labels), (_, _, peak) in summaries:
+            declare(f"{name}_max", "gauge")
+            lines.append(f"{name}_max{_labels(labels)} {peak}")
+        for (name, labels), (bounds, counts, total) in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip([*map(str, bounds), "+Inf"], counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+            self._histograms.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,123 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from utils.metrics import metrics
+
+
+class TraceLog:
+    """The spans of the most recent traces, so a slow request can be looked up by its trace or thread id."""
+
+    def __init__(self, max_traces=1000):
+        self.max_traces = max_traces
+        self._lock = threading.Lock()
+        self._traces = OrderedDict()
+
+    def record(self, trace_id, thread_id, span):
+        with self._lock:
+            trace = self._traces.get(trace_id)
+            if trace is None:
+                trace = self._traces[trace_id] = {"trace_id": trace_id, "thread_id": thread_id, "spans": []}
+                if len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            trace["spans"].append(span)
+
+    def get(self, trace_id):
+        with self._lock:
+            trace = self._traces.get(trace_id)
+            return None if trace is None else {**trace, "spans": list(trace["spans"])}
+
+    def for_thread(self, thread_id):
+        with self._lock:
+            return [{**t, "spans": list(t["spans"])} for t in self._traces.values() if t["thread_id"] == thread_id]
+
+
+traces = TraceLog()
+
+
+def new_trace_id():
+    return uuid.uuid4().hex
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Times graph nodes, tools and LLM calls into `metrics`, and their spans into `traces`.
+
+    Node runs are the chain runs LangGraph tags with their own node name;
+    the trace id comes from the run's metadata (see `traced_config`).
+    """
+
+    run_inline = True  # cheap; keeps timings on the thread that ran the step
+
+    def __init__(self, trace_log=traces):
+        self.trace_log = trace_log
+        self._runs = {}
+
+    def _start(self, run_id, kind, name, metadata):
+        self._runs[run_id] = (kind, name, metadata or {}, time.perf_counter())
+
+    def _end(self, run_id, status):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return None
+        kind, name, metadata, started = run
+        seconds = time.perf_counter() - started
+        metrics.histogram(f"{kind}_seconds", seconds, **{"model" if kind == "llm" else kind: name}, status=status)
+        if metadata.get("trace_id"):
+            self.trace_log.record(metadata["trace_id"], metadata.get("thread_id"),
+                                  {"kind": kind, "name": name, "status": status, "ms": round(seconds * 1000, 3),
+                                   "node": metadata.get("langgraph_node")})
+        return name
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        parent = self._runs.get(parent_run_id)
+        # the node's own function is a child run of the same name; time only the outer one
+        if node is not None and kwargs.get("name") == node and not (parent and parent[:2] == ("node", node)):
+            self._start(run_id, "node", node, metadata)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id, "ok")
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        # interrupt() raises through the node; that's a pause for review, not a failure
+        self._end(run_id, "interrupt" if type(error).__name__ == "GraphInterrupt" else "error")
+
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "tool", kwargs.get("name") or serialized.get("name"), metadata)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "error")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "llm", (metadata or {}).get("ls_model_name") or kwargs.get("name") or "chat_model", metadata)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model = self._end(run_id, "ok")
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                if usage:
+                    metrics.inc("llm_tokens", usage.get("input_tokens", 0), model=model, type="input")
+                    metrics.inc("llm_tokens", usage.get("output_tokens", 0), model=model, type="output")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "error")
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        metrics.inc("retries", kind=self._runs.get(run_id, ("unknown",))[0])
+
+
+metrics_handler = MetricsCallbackHandler()
+
+
+def traced_config(thread_id, trace_id=None):
+    """Graph config for one request: the thread, a trace id, and the metrics callback."""
+    return {"configurable": {"thread_id": thread_id},
+            "metadata": {"trace_id": trace_id or new_trace_id()},
+            "callbacks": [metrics_handler]}
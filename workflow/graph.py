@@ -1,25 +1,53 @@
+import threading
 from agents.Agents import AgentNodes
-from langgraph.checkpoint.memory import MemorySaver
+from agents.fast_path import fast_path_node
 from langgraph.graph import StateGraph,END,START
 from models.state import MediState
-from langgraph.prebuilt import ToolNode
-from tools.tools import (check_availability_by_doctor,
+from storage.checkpoint import make_checkpointer
+from utils.config import FAST_PATH
+from workflow.tool_node import ParallelToolNode
+from langchain_core.runnables import RunnableLambda
+from tools.tools import (list_doctors,
+                          check_availability_by_doctor,
                           check_availability_by_specialization,
+                          find_next_available,
                           set_appointment,
                           cancel_appointment,
                           reschedule_appointment)
 
-tools = [check_availability_by_doctor,check_availability_by_specialization,set_appointment,cancel_appointment,reschedule_appointment]
+read_only_tools = [list_doctors,check_availability_by_doctor,check_availability_by_specialization,find_next_available]
+tools = read_only_tools + [set_appointment,cancel_appointment,reschedule_appointment]
 
-def build_graph(nodes = AgentNodes()): 
+def build_graph(nodes = None, checkpointer = None, fast_path = FAST_PATH): 
+    nodes = nodes or AgentNodes() # built per call, not once at import as a default argument
     builder = StateGraph(MediState)
 
-    builder.add_node(nodes.assistant_node)
+    # sync graph.invoke (CLI) uses assistant_node, graph.ainvoke (API) awaits the LLM instead
+    builder.add_node("assistant_node", RunnableLambda(nodes.assistant_node, afunc=nodes.aassistant_node))
     builder.add_node(nodes.human_tool_review_node)
-    builder.add_node("tools", ToolNode(tools))
+    # independent lookups of one turn run concurrently; bookings run one by one, in order
+    tool_node = ParallelToolNode(tools, read_only=read_only_tools)
+    builder.add_node("tools", RunnableLambda(tool_node.run, afunc=tool_node.arun))
 
-    builder.add_edge(START, "assistant_node")
+    if fast_path:
+        # availability lookups are answered without an LLM call; everything else falls through
+        builder.add_node(fast_path_node)
+        builder.add_edge(START, "fast_path_node")
+    else:
+        builder.add_edge(START, "assistant_node")
     builder.add_conditional_edges("assistant_node", nodes.assistant_router, ["tools", "human_tool_review_node", END])
     builder.add_edge("tools", "assistant_node")
 
-    return builder.compile(checkpointer=MemorySaver())
+    return builder.compile(checkpointer=checkpointer or make_checkpointer())
+
+_graph = None
+_graph_lock = threading.Lock()
+
+def get_graph():
+    """The process-wide compiled graph: one LLM client and one checkpointer per process."""
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = build_graph()
+    return _graph
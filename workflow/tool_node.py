@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import ToolMessage
+
+from models.state import MediState
+from storage.slot_store import get_store, pinned_store, use_clinic
+from utils.config import TOOL_WORKERS
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tools")
+    return _executor
+
+
+class ParallelToolNode:
+    """Runs the tool calls of the last AI message.
+
+    The read-only calls before the first write run concurrently, all against
+    one refresh of the slot store; every call from the first write on then
+    runs one at a time, in the order the model emitted them, so a lookup
+    after a booking sees that booking. ToolMessages come back in the original
+    call order. Every call goes to the slot store shard of the conversation's
+    clinic.
+    """
+
+    def __init__(self, tools, read_only=()):
+        self.tools_by_name = {t.name: t for t in tools}
+        self.read_only = {t.name for t in read_only}
+
+    def _split(self, state: MediState):
+        """(all calls, the read-only calls before the first write, the calls from it on)."""
+        calls = state.messages[-1].tool_calls
+        first_write = next((i for i, c in enumerate(calls) if c["name"] not in self.read_only), len(calls))
+        return calls, calls[:first_write], calls[first_write:]
+
+    def _error(self, call, error):
+        return ToolMessage(content=f"Error: {error!r}\n Please fix your mistakes.", name=call["name"],
+                           tool_call_id=call["id"], status="error")
+
+    def _run_one(self, call, config):
+        tool = self.tools_by_name.get(call["name"])
+        if tool is None:
+            return self._error(call, f"{call['name']} is not a valid tool, try one of {list(self.tools_by_name)}.")
+        try:
+            return tool.invoke(call, config)
+        except Exception as e:
+            return self._error(call, e)
+
+    async def _arun_one(self, call, config):
+        tool = self.tools_by_name.get(call["name"])
+        if tool is None:
+            return self._error(call, f"{call['name']} is not a valid tool, try one of {list(self.tools_by_name)}.")
+        try:
+            return await tool.ainvoke(call, config)
+        except Exception as e:
+            return self._error(call, e)
+
+    def run(self, state: MediState, config) -> dict:
+        calls, reads, ordered = self._split(state)
+        results = {}
+        with use_clinic(state.clinic_id):
+            with pinned_store():
+                # each task gets its own copy of the context: the clinic, the store pin and the run's callbacks
+                futures = [(call, _get_executor().submit(contextvars.copy_context().run, self._run_one, call, config))
+                           for call in reads[1:]]
+                if reads:
+                    results[reads[0]["id"]] = self._run_one(reads[0], config)
+                for call, future in futures:
+                    results[call["id"]] = future.result()
+            for call in ordered:
+                results[call["id"]] = self._run_one(call, config)
+        return {"messages": [results[call["id"]] for call in calls]}
+
+    async def arun(self, state: MediState, config) -> dict:
+        calls, reads, ordered = self._split(state)
+        results = {}
+        with use_clinic(state.clinic_id):
+            # the refresh may reload the calendar; keep it off the event loop
+            with pinned_store(await asyncio.to_thread(get_store)):
+                # sync tools run in the loop's default executor, bounded at startup
+                for call, message in zip(reads, await asyncio.gather(*(self._arun_one(c, config) for c in reads))):
+                    results[call["id"]] = message
+            for call in ordered:
+                results[call["id"]] = await self._arun_one(call, config)
+        return {"messages": [results[call["id"]] for call in calls]}